@@ -1,22 +1,53 @@
+from frame_profiler import FrameProfiler
+from frame_scheduler import FrameScheduler
+import mesh_cache
+import objectives
+from particle_layer import ParticleLayer, with_heights
+from precision import resolve_dtype
+from simulation_runner import SimulationRunner
+from stopping import REASONS, StoppingCriteria
+from surface_renderer import SurfaceRenderer
+from swarm_x2 import SwarmX2
+import viewer_core
+
+profiler = FrameProfiler()  # Профилировщик кадров (клавиша P)
+camera_distance = 80  # Расстояние камеры от сцены
+
+# Параметры оптимизации
+iterCount = 500
+dimension = 2  # Для 3D визуализации выбираем 2 измерения
+swarmsize = 200
+
+minvalues = [-100.0] * dimension
+maxvalues = [100.0] * dimension
+currentVelocityRatio = 0.1
+localVelocityRatio = 1.0
+globalVelocityRatio = 5.0
+precision = "float64"  # Точность роя и сетки: "float32" или "float64"
+simulationStepsPerFrame = 1  # Итераций роя на показанный кадр (None - без ограничения)
+targetFps = 60  # Целевая частота кадров для подбора итераций на кадр (None - без подбора)
+vsync = True  # Вертикальная синхронизация (клавиша V)
+stoppingCriteria = StoppingCriteria(tolerance=1e-9, patience=100)  # Досрочная остановка расчёта
+
+# Оси с разметкой через 10 единичных отрезков
+def draw_axes():
+    viewer_core.draw_axes(200, colors=viewer_core.WHITE_AXES, tick_spacing=10, tick_style="lines", tick_size=2)
+
+# Основная функция
 def main():
-    if not glfw.init():
-        print("Не удалось инициализировать GLFW")
-        return
-
-    window = glfw.create_window(800, 600, "Particle Swarm Optimization", None, None)
-    if not window:
-        glfw.terminate()
-        print("Не удалось создать окно")
-        return
-
-    glfw.make_context_current(window)
-
-    glEnable(GL_DEPTH_TEST)
-    glClearColor(0.1, 0.1, 0.1, 1.0)
-
-    # Установка обработчиков событий
-    glfw.set_cursor_pos_callback(window, mouse_motion_callback)
-    glfw.set_mouse_button_callback(window, mouse_button_callback)
+    viewer_core.init()
+    # Планировщик подбирает число итераций роя так, чтобы кадр укладывался в 1 / targetFps
+    scheduler = None
+    if targetFps is not None:
+        scheduler = FrameScheduler(targetFps, steps=simulationStepsPerFrame or 1)
+
+    # Одно окно: 3D-вид слева, вид сверху на плоскость X-Y справа
+    camera = viewer_core.OrbitCamera(distance=camera_distance, swing=True, far=500)
+    viewer = viewer_core.Viewer("Particle Swarm Optimization", camera, width=1600, height=600,
+                                profiler=profiler, vsync=vsync, scheduler=scheduler)
+    viewer.views[0].viewport = (0.0, 0.0, 0.5, 1.0)
+    view_2d = viewer.add_view(viewer_core.OrthoCamera((-110, 110, -110, 110)), (0.5, 0.0, 0.5, 1.0),
+                              depth_test=False)
 
     # Инициализация роя частиц
     swarm = SwarmX2(
@@ -26,57 +57,49 @@ def main():
         currentVelocityRatio,
         localVelocityRatio,
         globalVelocityRatio,
+        dtype=resolve_dtype(precision),
     )
 
+    # Поверхность в буферах видеопамяти (сетка строится один раз)
+    surface = SurfaceRenderer()
+    surface.set_cached(mesh_cache.get_mesh(objectives.paraboloid, (-30, 100), (-30, 100), 100, color=(0.8, 0.8, 0.1),
+                                          dtype=resolve_dtype(precision)))
+
+    # Частицы в потоковом буфере; 2D-вид рисует X, Y из того же буфера
+    particles = ParticleLayer(color=(0.0, 1.0, 1.0), point_size=10)
+    particles_2d = particles.view(components=2, color=(1.0, 0.0, 0.0), point_size=5)
+
+    # Оси компилируются один раз; каждый кадр обновляются только частицы
+    viewer.scene.add_static("draw_axes", draw_axes)
+    viewer.scene.add("draw_surface", surface.draw)
+    viewer.scene.add("particles", particles.draw)
+    view_2d.scene.add("particles_2d", particles_2d.draw)
+
+    # Рой считается в отдельном потоке, отрисовка берёт последний снимок
+    runner = SimulationRunner(swarm, steps_per_frame=simulationStepsPerFrame, max_iterations=iterCount,
+                              stopping=stoppingCriteria)
+    runner.start()
+    if scheduler is not None:
+        scheduler.attach(runner)
+
+    stop_reported = False
+
+    def update():
+        nonlocal stop_reported
+        snapshot = runner.latest()
+        profiler.add("nextIteration", runner.take_step_time())
+        if runner.stop_reason is not None and not stop_reported:
+            print(f"Расчёт остановлен на итерации {snapshot.iteration}: {REASONS[runner.stop_reason]}")
+            stop_reported = True
+
+        with profiler.phase("particles_update"):
+            particles.update(with_heights(snapshot.positions, objectives.paraboloid))
+
     # Основной цикл оптимизации
-    for n in range(iterCount):
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        glLoadIdentity()
-
-        # Камера
-        gluPerspective(45, 800 / 600, 0.1, 500)
-
-        # Расстояние камеры и её вращение
-        camera_position = np.array([np.sin(np.radians(rotation_y)) * camera_distance,
-                                    np.sin(np.radians(rotation_x)) * camera_distance,
-                                    camera_distance])
-
-        # Устанавливаем позицию камеры
-        gluLookAt(camera_position[0], camera_position[1], camera_position[2], 0, 0, 0, 0, 1, 0)
-
-        # Вращение сцены
-        glRotatef(rotation_x, 1, 0, 0)
-        glRotatef(rotation_y, 0, 1, 0)
-
-        # Рисуем оси
-        draw_axes()
-
-        # Рисуем параболоид
-        x = np.linspace(-30, 100, 100)
-        y = np.linspace(-30, 100, 100)
-        X, Y = np.meshgrid(x, y)
-        Z = X**2 + Y**2
-        draw_surface(X, Y, Z)
-
-        # Отображаем частицы в 3D
-        positions = np.array([particle.position for particle in swarm.particles])
-        glColor3f(0.0, 1.0, 1.0)  # Зеленый цвет для частиц
-        glPointSize(10)
-        glBegin(GL_POINTS)
-        for pos in positions:
-            glVertex3f(pos[0], pos[1], rastrigin_function(pos[0], pos[1]))
-        glEnd()
-
-        # Отображаем частицы в 2D
-        draw_2d_particles(swarm)
-
-        # Обновление роя
-        swarm.nextIteration()
-
-        glfw.swap_buffers(window)
-        glfw.poll_events()
-
-    glfw.terminate()
+    viewer.run(update)
+
+    runner.stop()
+    viewer_core.terminate(profiler)
 
 if __name__ == "__main__":
     main()
@@ -1,16 +1,22 @@
 import glfw
-from OpenGL.GL import *
-from OpenGL.GLU import *
-import numpy as np
+
+from checkpoint import CheckpointWriter
+from density_layer import DensityLayer
+from frame_profiler import FrameProfiler
+from frame_scheduler import FrameScheduler
+import mesh_cache
+import objectives
+from particle_layer import ParticleLayer, with_heights
+from precision import resolve_dtype
+from simulation_runner import SimulationRunner
+from stopping import REASONS, StoppingCriteria
+from surface_renderer import SurfaceRenderer
 from swarm_x2 import SwarmX2
+from trajectory import ReplayPlayer, Trajectory, TrajectoryRecorder
 from utils import printResult
+import viewer_core
 
-# Глобальные переменные для управления вращением
-rotation_x = 0
-rotation_y = 0
-last_mouse_x = 0
-last_mouse_y = 0
-mouse_dragging = False
+profiler = FrameProfiler()  # Профилировщик кадров (клавиша P)
 camera_distance = 80  # Расстояние камеры от сцены
 
 # Параметры оптимизации
@@ -23,165 +29,56 @@ maxvalues = [100.0] * dimension
 currentVelocityRatio = 0.1
 localVelocityRatio = 1.0
 globalVelocityRatio = 5.0
-
-# Функция (для параболоида)
-def rastrigin_function(x, y):
-    return x**2 + y**2
-
-# Класс для роя частиц
-class Particle:
-    def __init__(self, dimension=2, bounds=(-100.0, 100.0)):
-        self.position = np.random.uniform(bounds[0], bounds[1], dimension)
-        self.velocity = np.random.uniform(-1, 1, dimension)
-        self.best_position = np.copy(self.position)
-        self.best_value = rastrigin_function(*self.position)
-
-    def update_velocity(self, global_best_position, w=0.5, c1=1.5, c2=1.5):
-        r1 = np.random.rand(len(self.position))
-        r2 = np.random.rand(len(self.position))
-        cognitive_velocity = c1 * r1 * (self.best_position - self.position)
-        social_velocity = c2 * r2 * (global_best_position - self.position)
-        self.velocity = w * self.velocity + cognitive_velocity + social_velocity
-
-    def update_position(self, bounds=(-100.0, 100.0)):
-        self.position += self.velocity
-        self.position = np.clip(self.position, bounds[0], bounds[1])
-        value = rastrigin_function(*self.position)
-        if value < self.best_value:
-            self.best_value = value
-            self.best_position = np.copy(self.position)
-
-class SwarmX2:
-    def __init__(self, swarmsize, minvalues, maxvalues, currentVelocityRatio, localVelocityRatio, globalVelocityRatio):
-        self.particles = [Particle(dimension=dimension, bounds=(minvalues[0], maxvalues[0])) for _ in range(swarmsize)]
-        self.global_best_position = np.copy(self.particles[0].best_position)
-        self.global_best_value = self.particles[0].best_value
-        self.minvalues = minvalues
-        self.maxvalues = maxvalues
-        self.currentVelocityRatio = currentVelocityRatio
-        self.localVelocityRatio = localVelocityRatio
-        self.globalVelocityRatio = globalVelocityRatio
-
-    def nextIteration(self):
-        for particle in self.particles:
-            particle.update_velocity(self.global_best_position)
-            particle.update_position(bounds=(self.minvalues[0], self.maxvalues[0]))
-
-            if particle.best_value < self.global_best_value:
-                self.global_best_value = particle.best_value
-                self.global_best_position = np.copy(particle.best_position)
-
-def draw_2d_particles(swarm):
-    """Рисует частицы в 2D на плоскости X-Y."""
-    positions = np.array([particle.position for particle in swarm.particles])
-    glColor3f(1.0, 0.0, 0.0)  # Красный цвет для частиц
-
-    glPointSize(5)
-    glBegin(GL_POINTS)
-    for pos in positions:
-        glVertex2f(pos[0], pos[1])  # Отображаем только X и Y
-    glEnd()
-
-# Отрисовка параболоидной поверхности
-def draw_surface(X, Y, Z):
-    glBegin(GL_QUADS)
-    for i in range(len(X) - 1):
-        for j in range(len(Y) - 1):
-            glColor3f(0.8, 0.8, 0.1)  # Цвет параболоида
-            glVertex3f(X[i, j], Y[i, j], Z[i, j])
-            glVertex3f(X[i + 1, j], Y[i + 1, j], Z[i + 1, j])
-            glVertex3f(X[i + 1, j + 1], Y[i + 1, j + 1], Z[i + 1, j + 1])
-            glVertex3f(X[i, j + 1], Y[i, j + 1], Z[i, j + 1])
-    glEnd()
-
+precision = "float64"  # Точность роя и сетки: "float32" или "float64"
+simulationStepsPerFrame = 1  # Итераций роя на показанный кадр (None - без ограничения)
+targetFps = 60  # Целевая частота кадров для подбора итераций на кадр (None - без подбора)
+vsync = True  # Вертикальная синхронизация (клавиша V)
+checkpointPath = None  # Файл контрольной точки роя (None - не сохранять)
+stoppingCriteria = StoppingCriteria(tolerance=1e-9, patience=100)  # Досрочная остановка расчёта
+recordPath = None  # Каталог для записи траектории (None - не записывать)
+replayPath = None  # Каталог записанной траектории для воспроизведения вместо расчёта
+densityView = False  # 2D-вид как карта плотности вместо точек (клавиша D)
+densityBins = 256  # Разрешение карты плотности
+splitView = False  # 3D и 2D виды в одном окне (False - два окна с общими буферами)
+
+# Оси с разметкой через 10 единичных отрезков
 def draw_axes():
-    glLineWidth(2)
-
-    # Рисуем оси
-    glBegin(GL_LINES)
-    glColor3f(1.0, 1.0, 1.0)  # Белый цвет для осей
-
-    # Ось X
-    glVertex3f(-200, 0, 0)  # Начало оси X
-    glVertex3f(200, 0, 0)   # Конец оси X
-
-    # Ось Y
-    glVertex3f(0, -200, 0)  # Начало оси Y
-    glVertex3f(0, 200, 0)   # Конец оси Y
-
-    # Ось Z
-    glVertex3f(0, 0, -200)  # Начало оси Z
-    glVertex3f(0, 0, 200)   # Конец оси Z
-    glEnd()
-
-    # Рисуем разметку
-    glLineWidth(1)
-    glBegin(GL_LINES)
-
-    # Разметка оси X
-    for i in range(-200, 201, 10):  # Разметка через 10 единичных отрезков
-        glVertex3f(i, -2, 0)  # Маленькая отметка ниже оси
-        glVertex3f(i, 2, 0)   # Маленькая отметка выше оси
-
-    # Разметка оси Y
-    for i in range(-200, 201, 10):  # Разметка через 10 единичных отрезков
-        glVertex3f(-2, i, 0)  # Маленькая отметка слева от оси
-        glVertex3f(2, i, 0)   # Маленькая отметка справа от оси
-
-    # Разметка оси Z
-    for i in range(-200, 201, 10):  # Разметка через 10 единичных отрезков
-        glVertex3f(0, -2, i)  # Маленькая отметка ниже оси
-        glVertex3f(0, 2, i)   # Маленькая отметка выше оси
-
-    glEnd()
-
-# Обработчик движения мыши
-def mouse_motion_callback(window, xpos, ypos):
-    global last_mouse_x, last_mouse_y, rotation_x, rotation_y, mouse_dragging
-
-    if mouse_dragging:
-        dx = xpos - last_mouse_x
-        dy = ypos - last_mouse_y
-        rotation_x += dy * 0.5  # Регулируем скорость вращения по вертикали
-        rotation_y += dx * 0.5  # Регулируем скорость вращения по горизонтали
-        last_mouse_x = xpos
-        last_mouse_y = ypos
-
-# Обработчик кнопок мыши
-def mouse_button_callback(window, button, action, mods):
-    global last_mouse_x, last_mouse_y, mouse_dragging
-
-    if button == glfw.MOUSE_BUTTON_LEFT:
-        if action == glfw.PRESS:
-            mouse_dragging = True
-            last_mouse_x, last_mouse_y = glfw.get_cursor_pos(window)
-        elif action == glfw.RELEASE:
-            mouse_dragging = False
+    viewer_core.draw_axes(200, colors=viewer_core.WHITE_AXES, tick_spacing=10, tick_style="lines", tick_size=2)
+
+# Обработчик клавиш
+def key_callback(key, action, mods):
+    global densityView
+    if key == glfw.KEY_D and action == glfw.PRESS:  # Точки / карта плотности
+        densityView = not densityView
 
 # Основная функция
 def main():
-    if not glfw.init():
-        print("Не удалось инициализировать GLFW")
-        return
-
-    # Создание окна для 3D-визуализации
-    window_3d = glfw.create_window(800, 600, "3D Particle Swarm Optimization", None, None)
-    if not window_3d:
-        glfw.terminate()
-        print("Не удалось создать 3D окно")
-        return
-
-    # Создание окна для 2D-визуализации
-    window_2d = glfw.create_window(800, 600, "2D Particle Swarm Optimization", None, None)
-    if not window_2d:
-        glfw.terminate()
-        print("Не удалось создать 2D окно")
-        return
-
-    # Установка контекста OpenGL для первого окна
-    glfw.make_context_current(window_3d)
-    glEnable(GL_DEPTH_TEST)
-    glClearColor(0.1, 0.1, 0.1, 1.0)
+    viewer_core.init()
+    # Планировщик подбирает число итераций роя так, чтобы кадр укладывался в 1 / targetFps
+    scheduler = None
+    if targetFps is not None:
+        scheduler = FrameScheduler(targetFps, steps=simulationStepsPerFrame or 1)
+
+    camera = viewer_core.OrbitCamera(distance=camera_distance, swing=True, far=500)
+    camera_2d = viewer_core.OrthoCamera((-110, 110, -110, 110))
+    if splitView:
+        # Оба вида в одном окне и одном контексте: 3D слева, 2D справа
+        viewer_3d = viewer_core.Viewer("Particle Swarm Optimization", camera, width=1600, height=600,
+                                       profiler=profiler, vsync=vsync, scheduler=scheduler)
+        viewer_3d.views[0].viewport = (0.0, 0.0, 0.5, 1.0)
+        view_2d = viewer_3d.add_view(camera_2d, (0.5, 0.0, 0.5, 1.0), depth_test=False)
+        viewers = [viewer_3d]
+    else:
+        # Окно для 3D-визуализации
+        viewer_3d = viewer_core.Viewer("3D Particle Swarm Optimization", camera, profiler=profiler,
+                                       vsync=vsync, scheduler=scheduler)
+        # Окно для 2D-визуализации разделяет объекты OpenGL первого окна, поэтому
+        # частицы загружаются один раз. Синхронизации ждёт только первое окно,
+        # иначе два обмена буферов за кадр ждали бы её дважды
+        viewer_2d = viewer_core.Viewer("2D Particle Swarm Optimization", camera_2d, profiler=profiler,
+                                       depth_test=False, vsync=False, share=viewer_3d)
+        view_2d = viewer_2d.views[0]
+        viewers = [viewer_3d, viewer_2d]
 
     # Инициализация роя частиц
     swarm = SwarmX2(
@@ -191,62 +88,97 @@ def main():
         currentVelocityRatio,
         localVelocityRatio,
         globalVelocityRatio,
+        dtype=resolve_dtype(precision),
     )
 
+    # Все объекты OpenGL создаются в контексте первого окна (второе его разделяет)
+    viewer_3d.make_current()
+
+    # Поверхность в буферах видеопамяти (сетка строится один раз)
+    surface = SurfaceRenderer()
+    surface.set_cached(mesh_cache.get_mesh(objectives.paraboloid, (-30, 100), (-30, 100), 100, color=(0.8, 0.8, 0.1),
+                                          dtype=resolve_dtype(precision)))
+
+    # Частицы в потоковом буфере; 2D-вид рисует X, Y из того же буфера
+    particles = ParticleLayer(color=(0.0, 1.0, 1.0), point_size=10)
+    particles_2d = particles.view(components=2, color=(1.0, 0.0, 0.0), point_size=5)
+    density_2d = DensityLayer((-110, 110, -110, 110), bins=densityBins)
+
+    # Оси компилируются один раз; каждый кадр обновляются только частицы
+    viewer_3d.scene.add_static("draw_axes", draw_axes)
+    viewer_3d.scene.add("draw_surface", surface.draw)
+    viewer_3d.scene.add("particles", particles.draw)
+    points_node = view_2d.scene.add("particles_2d", particles_2d.draw)
+    density_node = view_2d.scene.add("density_2d", density_2d.draw, visible=False)
+
+    for viewer in viewers:
+        viewer.key_handlers.append(key_callback)
+
+    if replayPath is not None:
+        # Воспроизведение записи: рой не считается, кадры берутся из файла
+        replay = ReplayPlayer(Trajectory(replayPath))
+        for viewer in viewers:
+            viewer.key_handlers.append(viewer_core.replay_key_handler(replay))
+        runner = None
+        source = replay
+    else:
+        # Продолжение прерванного запуска с контрольной точки
+        checkpoint = None
+        if checkpointPath is not None:
+            checkpoint = CheckpointWriter(swarm, checkpointPath)
+            checkpoint.resume()
+
+        recorder = None
+        if recordPath is not None:
+            if swarm.iteration >= iterCount:
+                print(f"Контрольная точка уже на итерации {swarm.iteration}: записан будет только этот кадр")
+            # Начальный кадр и оставшиеся итерации (не меньше одного кадра после завершённого расчёта)
+            recorder = TrajectoryRecorder(recordPath, swarmsize, dimension, max(iterCount - swarm.iteration, 0) + 1)
+
+        # Рой считается в отдельном потоке, отрисовка берёт последний снимок
+        runner = SimulationRunner(swarm, steps_per_frame=simulationStepsPerFrame, max_iterations=iterCount,
+                                  checkpoint=checkpoint, recorder=recorder, stopping=stoppingCriteria)
+        runner.start()
+        source = runner
+        if scheduler is not None:
+            scheduler.attach(runner)
+
     # Основной цикл оптимизации
-    while not glfw.window_should_close(window_3d) and not glfw.window_should_close(window_2d):
-        # ======= Отрисовка 3D =======
-        glfw.make_context_current(window_3d)
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        glLoadIdentity()
-
-        # Камера и вращение для 3D
-        gluPerspective(45, 800 / 600, 0.1, 500)
-        camera_position = np.array([
-            np.sin(np.radians(rotation_y)) * camera_distance,
-            np.sin(np.radians(rotation_x)) * camera_distance,
-            camera_distance
-        ])
-        gluLookAt(camera_position[0], camera_position[1], camera_position[2], 0, 0, 0, 0, 1, 0)
-        glRotatef(rotation_x, 1, 0, 0)
-        glRotatef(rotation_y, 0, 1, 0)
-
-        draw_axes()
-
-        # Рисуем параболоид
-        x = np.linspace(-30, 100, 100)
-        y = np.linspace(-30, 100, 100)
-        X, Y = np.meshgrid(x, y)
-        Z = X**2 + Y**2
-        draw_surface(X, Y, Z)
-
-        # Отображаем частицы в 3D
-        positions = np.array([particle.position for particle in swarm.particles])
-        glColor3f(0.0, 1.0, 1.0)
-        glPointSize(10)
-        glBegin(GL_POINTS)
-        for pos in positions:
-            glVertex3f(pos[0], pos[1], rastrigin_function(pos[0], pos[1]))
-        glEnd()
-
-        # ======= Отрисовка 2D =======
-        glfw.make_context_current(window_2d)
-        glClear(GL_COLOR_BUFFER_BIT)
-        glLoadIdentity()
-
-        # 2D ортографическая проекция
-        glOrtho(-110, 110, -110, 110, -1, 1)
-        draw_2d_particles(swarm)
-
-        # Обновляем рой
-        swarm.nextIteration()
-
-        # Обновляем оба окна
-        glfw.swap_buffers(window_3d)
-        glfw.swap_buffers(window_2d)
-        glfw.poll_events()
-
-    glfw.terminate()
+    stop_reported = False
+    while not any(viewer.should_close() for viewer in viewers):
+        if scheduler is not None:
+            scheduler.begin_frame()
+        snapshot = source.latest()
+        if runner is not None:
+            profiler.add("nextIteration", runner.take_step_time())
+            if runner.stop_reason is not None and not stop_reported:
+                print(f"Расчёт остановлен на итерации {snapshot.iteration}: {REASONS[runner.stop_reason]}")
+                stop_reported = True
+
+        # Одна загрузка частиц на кадр для обоих видов - в контексте первого окна,
+        # смена контекста перед вторым окном сбрасывает команды для него
+        points_node.visible = not densityView
+        density_node.visible = densityView
+        with profiler.phase("particles_update"):
+            viewer_3d.make_current()
+            particles.update(with_heights(snapshot.positions, objectives.paraboloid))
+            if densityView:
+                density_2d.update(snapshot.positions)
+
+        for viewer in viewers:
+            viewer.render()
+        if scheduler is not None:
+            scheduler.work_done()
+
+        for viewer in viewers:
+            viewer.swap()
+        viewer_3d.end_frame()
+        if scheduler is not None:
+            scheduler.end_frame()
+
+    if runner is not None:
+        runner.stop()
+    viewer_core.terminate(profiler)
 
 if __name__ == "__main__":
     main()
@@ -1,16 +1,21 @@
-import glfw
-from OpenGL.GL import *
-from OpenGL.GLU import *
 import numpy as np
+
+from checkpoint import CheckpointWriter
+from frame_profiler import FrameProfiler
+from frame_scheduler import FrameScheduler
+import mesh_cache
+import objectives
+from particle_layer import ParticleLayer, with_heights
+from precision import resolve_dtype
+from simulation_runner import SimulationRunner
+from stopping import REASONS, StoppingCriteria
+from surface_renderer import SurfaceRenderer
 from swarm_x2 import SwarmX2
+from trajectory import ReplayPlayer, Trajectory, TrajectoryRecorder
 from utils import printResult
+import viewer_core
 
-# Глобальные переменные для управления вращением
-rotation_x = 0
-rotation_y = 0
-last_mouse_x = 0
-last_mouse_y = 0
-mouse_dragging = False
+profiler = FrameProfiler()  # Профилировщик кадров (клавиша P)
 camera_distance = 80  # Расстояние камеры от сцены
 
 # Параметры оптимизации
@@ -23,53 +28,14 @@ maxvalues = [100.0] * dimension
 currentVelocityRatio = 0.1
 localVelocityRatio = 1.0
 globalVelocityRatio = 5.0
-
-# Функция Растригина (для параболоида)
-def rastrigin_function(x, y):
-    return x**2 + y**2
-
-# Класс для роя частиц
-class Particle:
-    def __init__(self, dimension=2, bounds=(-100.0, 100.0)):
-        self.position = np.random.uniform(bounds[0], bounds[1], dimension)
-        self.velocity = np.random.uniform(-1, 1, dimension)
-        self.best_position = np.copy(self.position)
-        self.best_value = rastrigin_function(*self.position)
-
-    def update_velocity(self, global_best_position, w=0.5, c1=1.5, c2=1.5):
-        r1 = np.random.rand(len(self.position))
-        r2 = np.random.rand(len(self.position))
-        cognitive_velocity = c1 * r1 * (self.best_position - self.position)
-        social_velocity = c2 * r2 * (global_best_position - self.position)
-        self.velocity = w * self.velocity + cognitive_velocity + social_velocity
-
-    def update_position(self, bounds=(-100.0, 100.0)):
-        self.position += self.velocity
-        self.position = np.clip(self.position, bounds[0], bounds[1])
-        value = rastrigin_function(*self.position)
-        if value < self.best_value:
-            self.best_value = value
-            self.best_position = np.copy(self.position)
-
-class SwarmX2:
-    def __init__(self, swarmsize, minvalues, maxvalues, currentVelocityRatio, localVelocityRatio, globalVelocityRatio):
-        self.particles = [Particle(dimension=dimension, bounds=(minvalues[0], maxvalues[0])) for _ in range(swarmsize)]
-        self.global_best_position = np.copy(self.particles[0].best_position)
-        self.global_best_value = self.particles[0].best_value
-        self.minvalues = minvalues
-        self.maxvalues = maxvalues
-        self.currentVelocityRatio = currentVelocityRatio
-        self.localVelocityRatio = localVelocityRatio
-        self.globalVelocityRatio = globalVelocityRatio
-
-    def nextIteration(self):
-        for particle in self.particles:
-            particle.update_velocity(self.global_best_position)
-            particle.update_position(bounds=(self.minvalues[0], self.maxvalues[0]))
-
-            if particle.best_value < self.global_best_value:
-                self.global_best_value = particle.best_value
-                self.global_best_position = np.copy(particle.best_position)
+precision = "float64"  # Точность роя и сетки: "float32" или "float64"
+simulationStepsPerFrame = 1  # Итераций роя на показанный кадр (None - без ограничения)
+targetFps = 60  # Целевая частота кадров для подбора итераций на кадр (None - без подбора)
+vsync = True  # Вертикальная синхронизация (клавиша V)
+checkpointPath = None  # Файл контрольной точки роя (None - не сохранять)
+stoppingCriteria = StoppingCriteria(tolerance=1e-9, patience=100)  # Досрочная остановка расчёта
+recordPath = None  # Каталог для записи траектории (None - не записывать)
+replayPath = None  # Каталог записанной траектории для воспроизведения вместо расчёта
 
 def plotSwarm(swarm, iteration, ax):
     """Визуализирует текущее состояние роя с использованием OpenGL."""
@@ -92,83 +58,20 @@ def plotSwarm(swarm, iteration, ax):
     ax.set_zlabel("Z")
     ax.legend()
 
-# Отрисовка параболоидной поверхности
-def draw_surface(X, Y, Z):
-    glBegin(GL_QUADS)
-    for i in range(len(X) - 1):
-        for j in range(len(Y) - 1):
-            glColor3f(0.8, 0.8, 0.1)  # Цвет параболоида
-            glVertex3f(X[i, j], Y[i, j], Z[i, j])
-            glVertex3f(X[i + 1, j], Y[i + 1, j], Z[i + 1, j])
-            glVertex3f(X[i + 1, j + 1], Y[i + 1, j + 1], Z[i + 1, j + 1])
-            glVertex3f(X[i, j + 1], Y[i, j + 1], Z[i, j + 1])
-    glEnd()
-
 # Отрисовка осей
 def draw_axes():
-    glLineWidth(2)
-    glBegin(GL_LINES)
-
-    # Ось X (красная)
-    glColor3f(1.0, 0.0, 0.0)
-    glVertex3f(-500, 0, 0)
-    glVertex3f(500, 0, 0)
-
-    # Ось Y (зеленая)
-    glColor3f(0.0, 1.0, 0.0)
-    glVertex3f(0, -500, 0)
-    glVertex3f(0, 500, 0)
-
-    # Ось Z (синяя)
-    glColor3f(0.0, 0.0, 1.0)
-    glVertex3f(0, 0, -500)
-    glVertex3f(0, 0, 500)
-
-    glEnd()
-
-# Обработчик движения мыши
-def mouse_motion_callback(window, xpos, ypos):
-    global last_mouse_x, last_mouse_y, rotation_x, rotation_y, mouse_dragging
-
-    if mouse_dragging:
-        dx = xpos - last_mouse_x
-        dy = ypos - last_mouse_y
-        rotation_x += dy * 0.5  # Регулируем скорость вращения по вертикали
-        rotation_y += dx * 0.5  # Регулируем скорость вращения по горизонтали
-        last_mouse_x = xpos
-        last_mouse_y = ypos
-
-# Обработчик кнопок мыши
-def mouse_button_callback(window, button, action, mods):
-    global last_mouse_x, last_mouse_y, mouse_dragging
-
-    if button == glfw.MOUSE_BUTTON_LEFT:
-        if action == glfw.PRESS:
-            mouse_dragging = True
-            last_mouse_x, last_mouse_y = glfw.get_cursor_pos(window)
-        elif action == glfw.RELEASE:
-            mouse_dragging = False
+    viewer_core.draw_axes(500)
 
 # Основная функция
 def main():
-    if not glfw.init():
-        print("Не удалось инициализировать GLFW")
-        return
-
-    window = glfw.create_window(800, 600, "Particle Swarm Optimization", None, None)
-    if not window:
-        glfw.terminate()
-        print("Не удалось создать окно")
-        return
-
-    glfw.make_context_current(window)
-
-    glEnable(GL_DEPTH_TEST)
-    glClearColor(0.1, 0.1, 0.1, 1.0)
-
-    # Установка обработчиков событий
-    glfw.set_cursor_pos_callback(window, mouse_motion_callback)
-    glfw.set_mouse_button_callback(window, mouse_button_callback)
+    viewer_core.init()
+    # Планировщик подбирает число итераций роя так, чтобы кадр укладывался в 1 / targetFps
+    scheduler = None
+    if targetFps is not None:
+        scheduler = FrameScheduler(targetFps, steps=simulationStepsPerFrame or 1)
+    camera = viewer_core.OrbitCamera(distance=camera_distance, swing=True, far=500)
+    viewer = viewer_core.Viewer("Particle Swarm Optimization", camera, profiler=profiler,
+                                vsync=vsync, scheduler=scheduler)
 
     # Инициализация роя частиц
     swarm = SwarmX2(
@@ -178,54 +81,70 @@ def main():
         currentVelocityRatio,
         localVelocityRatio,
         globalVelocityRatio,
+        dtype=resolve_dtype(precision),
     )
 
+    # Поверхность в буферах видеопамяти (сетка строится один раз)
+    surface = SurfaceRenderer()
+    surface.set_cached(mesh_cache.get_mesh(objectives.paraboloid, (-30, 100), (-30, 100), 100, color=(0.8, 0.8, 0.1),
+                                          dtype=resolve_dtype(precision)))
+
+    # Частицы в потоковом буфере
+    particles = ParticleLayer(color=(0.0, 1.0, 1.0), point_size=10)
+
+    # Оси компилируются один раз; каждый кадр обновляются только частицы
+    viewer.scene.add_static("draw_axes", draw_axes)
+    viewer.scene.add("draw_surface", surface.draw)
+    viewer.scene.add("particles", particles.draw)
+
+    if replayPath is not None:
+        # Воспроизведение записи: рой не считается, кадры берутся из файла
+        replay = ReplayPlayer(Trajectory(replayPath))
+        viewer.key_handlers.append(viewer_core.replay_key_handler(replay))
+        runner = None
+        source = replay
+    else:
+        # Продолжение прерванного запуска с контрольной точки
+        checkpoint = None
+        if checkpointPath is not None:
+            checkpoint = CheckpointWriter(swarm, checkpointPath)
+            checkpoint.resume()
+
+        recorder = None
+        if recordPath is not None:
+            if swarm.iteration >= iterCount:
+                print(f"Контрольная точка уже на итерации {swarm.iteration}: записан будет только этот кадр")
+            # Начальный кадр и оставшиеся итерации (не меньше одного кадра после завершённого расчёта)
+            recorder = TrajectoryRecorder(recordPath, swarmsize, dimension, max(iterCount - swarm.iteration, 0) + 1)
+
+        # Рой считается в отдельном потоке, отрисовка берёт последний снимок
+        runner = SimulationRunner(swarm, steps_per_frame=simulationStepsPerFrame, max_iterations=iterCount,
+                                  checkpoint=checkpoint, recorder=recorder, stopping=stoppingCriteria)
+        runner.start()
+        source = runner
+        if scheduler is not None:
+            scheduler.attach(runner)
+
+    stop_reported = False
+
+    def update():
+        nonlocal stop_reported
+        snapshot = source.latest()
+        if runner is not None:
+            profiler.add("nextIteration", runner.take_step_time())
+            if runner.stop_reason is not None and not stop_reported:
+                print(f"Расчёт остановлен на итерации {snapshot.iteration}: {REASONS[runner.stop_reason]}")
+                stop_reported = True
+
+        with profiler.phase("particles_update"):
+            particles.update(with_heights(snapshot.positions, objectives.paraboloid))
+
     # Основной цикл оптимизации
-    for n in range(iterCount):
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        glLoadIdentity()
-
-        # Камера
-        gluPerspective(45, 800 / 600, 0.1, 500)
-
-        # Расстояние камеры и её вращение
-        camera_position = np.array([np.sin(np.radians(rotation_y)) * camera_distance,
-                                    np.sin(np.radians(rotation_x)) * camera_distance,
-                                    camera_distance])
-
-        # Устанавливаем позицию камеры
-        gluLookAt(camera_position[0], camera_position[1], camera_position[2], 0, 0, 0, 0, 1, 0)
-
-        # Вращение сцены
-        glRotatef(rotation_x, 1, 0, 0)
-        glRotatef(rotation_y, 0, 1, 0)
-
-        # Рисуем оси
-        draw_axes()
-
-        # Рисуем параболоид
-        x = np.linspace(-30, 100, 100)
-        y = np.linspace(-30, 100, 100)
-        X, Y = np.meshgrid(x, y)
-        Z = X**2 + Y**2
-        draw_surface(X, Y, Z)
-
-        # Отображаем частицы
-        positions = np.array([particle.position for particle in swarm.particles])
-        glColor3f(0.0, 1.0, 1.0)  # Зеленый цвет для частиц
-        glPointSize(10)
-        glBegin(GL_POINTS)
-        for pos in positions:
-            glVertex3f(pos[0], pos[1], rastrigin_function(pos[0], pos[1]))
-        glEnd()
-
-        # Обновление роя
-        swarm.nextIteration()
-
-        glfw.swap_buffers(window)
-        glfw.poll_events()
-
-    glfw.terminate()
+    viewer.run(update)
+
+    if runner is not None:
+        runner.stop()
+    viewer_core.terminate(profiler)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,247 @@
+"""Микробенчмарки горячих участков: рой, целевые функции, сетки и отрисовка.
+
+Примеры:
+    python benchmarks.py --output bench.json
+    python benchmarks.py --output bench.json --baseline bench_baseline.json --threshold 0.15
+    python benchmarks.py --filter swarm --gl
+"""
+import argparse
+import importlib
+import json
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+
+import objectives
+from f import SwarmSchwefel
+from mesh_cache import MeshCache
+from swarm_x2 import SwarmX2, rastrigin_function
+
+SWARM_SIZES = (200, 5_000, 100_000)
+DIMENSIONS = (2, 10)
+
+
+class SkipBenchmark(Exception):
+    pass
+
+
+def _swarm_case(swarm_class, swarmsize, dimension, bound, dtype=np.float64):
+    def setup():
+        swarm = swarm_class(swarmsize, [-bound] * dimension, [bound] * dimension, 0.1, 1.0, 5.0, seed=0, dtype=dtype)
+        return swarm.nextIteration
+    return setup
+
+
+def _objective_case(function, count, dimension, bound):
+    def setup():
+        points = np.random.default_rng(0).uniform(-bound, bound, (count, dimension))
+        return lambda: function(points)
+    return setup
+
+
+def _rastrigin_case(count):
+    def setup():
+        x, y = np.random.default_rng(0).uniform(-100, 100, (2, count))
+        return lambda: rastrigin_function(x, y)
+    return setup
+
+
+def _final_func_case(count, dimension):
+    def setup():
+        swarm = SwarmSchwefel(2, [-500.0] * dimension, [500.0] * dimension, 0.1, 1.0, 5.0, seed=0)
+        points = np.random.default_rng(0).uniform(-600, 600, (count, dimension))
+        return lambda: swarm._finalFunc(points)
+    return setup
+
+
+def _mesh_case(objective, step, range_limit):
+    # Те же параметры, что в generate_schwefel_mesh / generate_paraboloid_mesh,
+    # но каждый раз в новом кэше, чтобы мерить построение, а не попадание
+    def setup():
+        count = int(round(2 * range_limit / step))
+        limits = (-range_limit, range_limit - step)
+        return lambda: MeshCache().get(objective, limits, limits, count)
+    return setup
+
+
+def _vtk_surface_case(resolution):
+    def setup():
+        try:
+            vers1 = importlib.import_module("vers1")
+        except ImportError as error:
+            raise SkipBenchmark(f"vtk недоступен: {error}")
+        equation = "np.sin(x**2 + y**2) / (x**2 + y**2 + 1e-10)"
+        return lambda: vers1.create_surface(equation, (-4, 4), (-4, 4), resolution)
+    return setup
+
+
+def _gl_context():
+    """Скрытое окно GLFW как внеэкранный контекст (например, на программном Mesa)."""
+    try:
+        import glfw
+    except ImportError as error:
+        raise SkipBenchmark(f"glfw недоступен: {error}")
+    if not glfw.init():
+        raise SkipBenchmark("не удалось инициализировать GLFW")
+    glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
+    window = glfw.create_window(800, 600, "benchmark", None, None)
+    if not window:
+        raise SkipBenchmark("не удалось создать скрытое окно")
+    glfw.make_context_current(window)
+    return window
+
+
+def _gl_surface_case(step):
+    def setup():
+        _gl_context()
+        from OpenGL.GL import glFinish
+        from surface_renderer import SurfaceRenderer
+
+        count = int(round(1000 / step))
+        surface = SurfaceRenderer()
+        surface.set_cached(MeshCache().get(objectives.schwefel_raw, (-500, 500 - step), (-500, 500 - step), count))
+
+        def run():
+            surface.draw()
+            glFinish()
+        return run
+    return setup
+
+
+def _gl_particles_case(swarmsize):
+    def setup():
+        _gl_context()
+        from OpenGL.GL import glFinish
+        from particle_layer import ParticleLayer, with_heights
+
+        positions = np.random.default_rng(0).uniform(-100, 100, (swarmsize, 2))
+        layer = ParticleLayer()
+
+        def run():
+            layer.update(with_heights(positions, objectives.paraboloid))
+            layer.draw()
+            glFinish()
+        return run
+    return setup
+
+
+def collect_benchmarks(include_gl=False):
+    """Список (имя, setup); setup возвращает измеряемую функцию без аргументов."""
+    cases = []
+    for swarmsize in SWARM_SIZES:
+        for dimension in DIMENSIONS:
+            cases.append((f"swarm_x2.nextIteration[n={swarmsize},d={dimension}]",
+                          _swarm_case(SwarmX2, swarmsize, dimension, 100.0)))
+            cases.append((f"swarm_schwefel.nextIteration[n={swarmsize},d={dimension}]",
+                          _swarm_case(SwarmSchwefel, swarmsize, dimension, 500.0)))
+        cases.append((f"swarm_x2.nextIteration[n={swarmsize},d=10,float32]",
+                       _swarm_case(SwarmX2, swarmsize, 10, 100.0, np.float32)))
+
+    for count in (5_000, 100_000):
+        cases.append((f"objective.rastrigin_function[n={count}]", _rastrigin_case(count)))
+        cases.append((f"objective.schwefel_function[n={count}]", _objective_case(objectives.schwefel_raw, count, 2, 500.0)))
+        cases.append((f"objective.SwarmSchwefel._finalFunc[n={count},d=10]", _final_func_case(count, 10)))
+
+    cases.append(("mesh.generate_schwefel_mesh[step=20]", _mesh_case(objectives.schwefel_raw, 20, 500)))
+    cases.append(("mesh.generate_schwefel_mesh[step=2]", _mesh_case(objectives.schwefel_raw, 2, 500)))
+    cases.append(("mesh.generate_paraboloid_mesh[step=1]", _mesh_case(objectives.paraboloid, 1, 10)))
+    cases.append(("mesh.generate_paraboloid_mesh[step=0.02]", _mesh_case(objectives.paraboloid, 0.02, 10)))
+    cases.append(("mesh.create_surface[resolution=100]", _vtk_surface_case(100)))
+    cases.append(("mesh.create_surface[resolution=1000]", _vtk_surface_case(1000)))
+
+    if include_gl:
+        cases.append(("gl.surface_draw[step=5]", _gl_surface_case(5)))
+        cases.append(("gl.surface_draw[step=1]", _gl_surface_case(1)))
+        for swarmsize in SWARM_SIZES:
+            cases.append((f"gl.particles_update_draw[n={swarmsize}]", _gl_particles_case(swarmsize)))
+    return cases
+
+
+def measure(function, repeat=7, min_time=0.05):
+    """Секунды на вызов: число вызовов подбирается так, чтобы замер длился не меньше min_time."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number)
+    return {"median": statistics.median(timings), "min": min(timings), "number": number, "repeat": repeat}
+
+
+def compare(results, baseline, threshold):
+    """Список (имя, отношение медиан) для замедлившихся больше чем на threshold."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None or reference["median"] <= 0:
+            continue
+        ratio = result["median"] / reference["median"]
+        if ratio > 1.0 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Микробенчмарки роя, целевых функций, сеток и отрисовки")
+    parser.add_argument("--output", default="bench_results.json", help="файл с результатами (JSON)")
+    parser.add_argument("--baseline", default=None, help="сохранённые результаты для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.10, help="допустимое замедление (доля)")
+    parser.add_argument("--filter", default=None, help="запускать только бенчмарки, содержащие подстроку")
+    parser.add_argument("--repeat", type=int, default=7, help="число повторов замера")
+    parser.add_argument("--gl", action="store_true", help="включить замеры отрисовки во внеэкранном контексте")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    results = {}
+    for name, setup in collect_benchmarks(include_gl=args.gl):
+        if args.filter and args.filter not in name:
+            continue
+        try:
+            function = setup()
+        except SkipBenchmark as reason:
+            print(f"{name:58s} пропущен: {reason}")
+            continue
+        results[name] = measure(function, repeat=args.repeat)
+        print(f"{name:58s} {results[name]['median'] * 1e3:10.3f} мс")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for name, ratio in regressions:
+        print(f"Регрессия: {name} медленнее базовой линии в {ratio:.2f} раза")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
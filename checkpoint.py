@@ -0,0 +1,94 @@
+import json
+import os
+
+import numpy as np
+
+# Контрольные точки роя: все массивы состояния, глобальный лучший результат,
+# состояние генератора случайных чисел и счётчики пишутся в один файл .npz
+# без сериализации объектов частиц. Запись идёт во временный файл, который
+# затем атомарно заменяет старый.
+
+FORMAT_VERSION = 1
+
+ARRAYS = ("positions", "velocities", "best_positions", "best_values", "global_best_position")
+
+# Префикс массивов суррогатной модели (окно точек, решение, счётчики)
+SURROGATE_PREFIX = "surrogate_"
+
+
+def save_checkpoint(swarm, path):
+    state = {name: getattr(swarm, name) for name in ARRAYS}
+    rng_state = json.dumps(swarm.rng.bit_generator.state).encode()
+    state.update(
+        version=np.int64(FORMAT_VERSION),
+        swarm_class=np.str_(type(swarm).__name__),
+        global_best_value=np.float64(swarm.global_best_value),
+        iteration=np.int64(swarm.iteration),
+        evaluations=np.int64(swarm.evaluations),
+        rng_state=np.frombuffer(rng_state, dtype=np.uint8),
+    )
+    surrogate = getattr(swarm, "surrogate", None)
+    if surrogate is not None:
+        state.update({SURROGATE_PREFIX + name: value for name, value in surrogate.state().items()})
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        np.savez(file, **state)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(swarm, path):
+    """Восстанавливает состояние роя swarm (того же класса и размера) из файла."""
+    with np.load(path, allow_pickle=False) as data:
+        if int(data["version"]) != FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия контрольной точки: {int(data['version'])}")
+        if str(data["swarm_class"]) != type(swarm).__name__:
+            raise ValueError(f"Контрольная точка роя {data['swarm_class']}, а не {type(swarm).__name__}")
+        if data["positions"].shape != swarm.positions.shape:
+            raise ValueError(f"Размер роя {data['positions'].shape} не совпадает с {swarm.positions.shape}")
+        if data["positions"].dtype != swarm.positions.dtype:
+            raise ValueError(f"Точность роя {data['positions'].dtype} не совпадает с {swarm.positions.dtype}")
+
+        for name in ARRAYS:
+            setattr(swarm, name, data[name].copy())
+        # В файле значение хранится в float64; в рое - в его точности, как после расчёта
+        swarm.global_best_value = swarm.dtype.type(data["global_best_value"][()])
+        swarm.iteration = int(data["iteration"])
+        swarm.evaluations = int(data["evaluations"])
+        swarm.rng.bit_generator.state = json.loads(data["rng_state"].tobytes().decode())
+
+        surrogate = getattr(swarm, "surrogate", None)
+        if surrogate is not None:
+            names = [name for name in data.files if name.startswith(SURROGATE_PREFIX)]
+            if not names:
+                raise ValueError("В контрольной точке нет состояния суррогатной модели")
+            surrogate.load_state({name[len(SURROGATE_PREFIX):]: data[name] for name in names})
+    return swarm
+
+
+class CheckpointWriter:
+    """Сохраняет контрольную точку каждые every итераций роя."""
+
+    def __init__(self, swarm, path, every=100):
+        self.swarm = swarm
+        self.path = path
+        self.every = every
+        self._saved_iteration = swarm.iteration
+
+    def maybe_save(self):
+        if self.swarm.iteration - self._saved_iteration >= self.every:
+            self.save()
+
+    def save(self):
+        save_checkpoint(self.swarm, self.path)
+        self._saved_iteration = self.swarm.iteration
+
+    def resume(self):
+        """Загружает контрольную точку, если файл существует. Возвращает True при загрузке."""
+        if not os.path.exists(self.path):
+            return False
+        load_checkpoint(self.swarm, self.path)
+        self._saved_iteration = self.swarm.iteration
+        return True
@@ -0,0 +1,62 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Цветовые карты для раскраски поверхностей по высоте.
+#
+# Каждая карта задаётся опорными цветами, равномерно расположенными на
+# отрезке [0, 1]; по ним строится таблица (LUT), через которую один раз на
+# сетку переводятся нормализованные высоты в цвета вершин.
+
+COLORMAPS = {
+    # Исходная раскраска программ: (0.2, z, 1 - z)
+    "classic": [(0.2, 0.0, 1.0), (0.2, 1.0, 0.0)],
+    "viridis": [
+        "#440154", "#482878", "#3e4a89", "#31688e", "#26828e",
+        "#1f9e89", "#35b779", "#6dcd59", "#b4de2c", "#fde725",
+    ],
+    "coolwarm": [
+        (0.230, 0.299, 0.754), (0.552, 0.690, 0.996), (0.865, 0.865, 0.865),
+        (0.958, 0.604, 0.482), (0.706, 0.016, 0.150),
+    ],
+    "gray": [(0.0, 0.0, 0.0), (1.0, 1.0, 1.0)],
+}
+
+LUT_SIZE = 256
+
+
+def _to_rgb(color):
+    if isinstance(color, str):
+        return tuple(int(color[i:i + 2], 16) / 255.0 for i in (1, 3, 5))
+    return tuple(color)
+
+
+@lru_cache(maxsize=None)
+def lookup_table(name, size=LUT_SIZE):
+    """Таблица цветов (size, 3) float32 для карты name."""
+    if name not in COLORMAPS:
+        raise ValueError(f"Неизвестная цветовая карта: {name}")
+    stops = np.array([_to_rgb(color) for color in COLORMAPS[name]], dtype=np.float64)
+    positions = np.linspace(0.0, 1.0, len(stops))
+    samples = np.linspace(0.0, 1.0, size)
+    table = np.stack([np.interp(samples, positions, stops[:, channel]) for channel in range(3)], axis=-1)
+    table = table.astype(np.float32)
+    table.flags.writeable = False
+    return table
+
+
+def normalize(Z, vmin=None, vmax=None):
+    """Высоты, приведённые к [0, 1] по диапазону [vmin, vmax] (по умолчанию - min/max Z)."""
+    Z = np.asarray(Z)
+    vmin = Z.min() if vmin is None else vmin
+    vmax = Z.max() if vmax is None else vmax
+    if vmax <= vmin:
+        return np.zeros(Z.shape, dtype=np.float32)
+    return np.clip((Z - vmin) / (vmax - vmin), 0.0, 1.0).astype(np.float32)
+
+
+def apply_colormap(Z, name="classic", vmin=None, vmax=None):
+    """Цвета вершин (Z.size, 3) float32: одна нормализация и выборка из LUT."""
+    table = lookup_table(name)
+    index = (normalize(Z, vmin, vmax).ravel() * (len(table) - 1) + 0.5).astype(np.intp)
+    return table[index]
@@ -0,0 +1,90 @@
+from OpenGL.GL import *
+import numpy as np
+
+import colormap
+
+
+def density_histogram(positions, extent, bins):
+    """Число частиц в каждой ячейке сетки bins x bins (строки - Y, столбцы - X).
+
+    Ячейка считается по X, Y частицы, гистограмма собирается одним
+    np.bincount; частицы вне extent = (xmin, xmax, ymin, ymax) отбрасываются.
+    """
+    xmin, xmax, ymin, ymax = extent
+    u = (positions[:, 0] - xmin) * (bins / (xmax - xmin))
+    v = (positions[:, 1] - ymin) * (bins / (ymax - ymin))
+    # Проверка до приведения к целым: отсечение дробной части у -0.5 дало бы ячейку 0
+    inside = (u >= 0) & (u < bins) & (v >= 0) & (v < bins)
+    if not inside.all():
+        u, v = u[inside], v[inside]
+    ix, iy = u.astype(np.intp), v.astype(np.intp)
+    return np.bincount(iy * bins + ix, minlength=bins * bins).reshape(bins, bins)
+
+
+def density_colors(counts, colormap_name="viridis"):
+    """Цвета ячеек (bins, bins, 3) float32 по логарифму числа частиц."""
+    table = colormap.lookup_table(colormap_name)
+    peak = counts.max()
+    if peak == 0:
+        index = np.zeros(counts.shape, dtype=np.intp)
+    else:
+        scale = (len(table) - 1) / np.log1p(peak)
+        index = (np.log1p(counts, dtype=np.float32) * scale + 0.5).astype(np.intp)
+    return table[index]
+
+
+class DensityLayer:
+    """Плотность роя в 2D-виде: гистограмма позиций как текстура на одном квадрате.
+
+    Стоимость отрисовки не зависит от числа частиц: на GPU каждый кадр
+    уходит только текстура bins x bins.
+    """
+
+    def __init__(self, extent, bins=256, colormap_name="viridis"):
+        self.extent = extent
+        self.bins = bins
+        self.colormap_name = colormap_name
+        self._texture = None
+
+    def update(self, positions):
+        colors = np.ascontiguousarray(density_colors(density_histogram(positions, self.extent, self.bins),
+                                                     self.colormap_name))
+        # Текстура создаётся при первой загрузке в текущем контексте
+        if self._texture is None:
+            self._texture = glGenTextures(1)
+            glBindTexture(GL_TEXTURE_2D, self._texture)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+            glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, self.bins, self.bins, 0, GL_RGB, GL_FLOAT, colors)
+        else:
+            glBindTexture(GL_TEXTURE_2D, self._texture)
+            glTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, self.bins, self.bins, GL_RGB, GL_FLOAT, colors)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+    def draw(self):
+        if self._texture is None:
+            return
+        xmin, xmax, ymin, ymax = self.extent
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, self._texture)
+        glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_REPLACE)
+        glBegin(GL_QUADS)
+        glTexCoord2f(0, 0)
+        glVertex2f(xmin, ymin)
+        glTexCoord2f(1, 0)
+        glVertex2f(xmax, ymin)
+        glTexCoord2f(1, 1)
+        glVertex2f(xmax, ymax)
+        glTexCoord2f(0, 1)
+        glVertex2f(xmin, ymax)
+        glEnd()
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_TEXTURE_2D)
+
+    def delete(self):
+        if self._texture is not None:
+            glDeleteTextures([self._texture])
+            self._texture = None
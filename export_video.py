@@ -0,0 +1,121 @@
+"""Запись видео оптимизации без дисплея.
+
+Пример запуска:
+    python export_video.py --swarm schwefel --swarmsize 2000 --iterations 300 --output run.mp4
+    python export_video.py --output frames/   # пронумерованные PNG, ffmpeg не нужен
+
+Кадры рисуются в скрытом окне (без DISPLAY - программным Mesa через OSMesa)
+и читаются асинхронно через PBO, запись идёт в фоновом потоке.
+"""
+import argparse
+import time
+
+import headless
+import mesh_cache
+import objectives
+from particle_layer import ParticleLayer, with_heights
+from precision import PRECISIONS
+from surface_renderer import SurfaceRenderer
+from video_export import VideoExporter
+import viewer_core
+
+# Поверхность и дистанция камеры для каждого роя
+SURFACES = {
+    "x2": {"colormap_name": "classic", "color": (0.8, 0.8, 0.1), "camera_distance": 300, "axis_length": 200},
+    "schwefel": {"colormap_name": "classic", "color": None, "camera_distance": 1500, "axis_length": 1000},
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Запись видео оптимизации роем частиц без дисплея")
+    parser.add_argument("--swarm", choices=sorted(headless.SWARMS), default="x2", help="оптимизируемая функция")
+    parser.add_argument("--swarmsize", type=int, default=1000, help="число частиц")
+    parser.add_argument("--min", type=float, default=None, help="нижняя граница по каждой координате")
+    parser.add_argument("--max", type=float, default=None, help="верхняя граница по каждой координате")
+    parser.add_argument("--iterations", type=int, default=300, help="число итераций")
+    parser.add_argument("--current", type=float, default=0.1, help="currentVelocityRatio")
+    parser.add_argument("--local", type=float, default=1.0, help="localVelocityRatio")
+    parser.add_argument("--global", dest="global_", type=float, default=5.0, help="globalVelocityRatio")
+    parser.add_argument("--expression", default=None, help="своя функция f(x, y) для роя x2")
+    parser.add_argument("--seed", type=int, default=None, help="зерно генератора случайных чисел")
+    parser.add_argument("--precision", choices=sorted(PRECISIONS), default="float64", help="точность массивов роя")
+    parser.add_argument("--output", default="swarm.mp4", help="файл видео (через ffmpeg) или каталог для PNG")
+    parser.add_argument("--width", type=int, default=1280, help="ширина кадра")
+    parser.add_argument("--height", type=int, default=720, help="высота кадра")
+    parser.add_argument("--fps", type=int, default=30, help="частота кадров видео")
+    parser.add_argument("--steps-per-frame", type=int, default=1, help="итераций роя на кадр")
+    parser.add_argument("--resolution", type=int, default=200, help="число узлов сетки поверхности по оси")
+    parser.add_argument("--pbo-count", type=int, default=3, help="число буферов в кольце чтения кадров")
+    args = parser.parse_args(argv)
+    if args.expression is not None and args.swarm != "x2":
+        parser.error("--expression работает только с --swarm x2")
+    # Поверхность f(x, y) рисуется только для двумерной задачи
+    args.dimension = 2
+    args.surrogate = False
+    return args
+
+
+def export(args):
+    """Рисует по кадру на каждые steps_per_frame итераций и возвращает отчёт."""
+    swarm = headless.create_swarm(args)
+    surface_options = SURFACES[args.swarm]
+    objective = swarm.objective if args.swarm == "x2" else objectives.schwefel_raw
+    lower, upper = swarm.minvalues[0], swarm.maxvalues[0]
+
+    viewer_core.init(offscreen=True)
+    camera = viewer_core.OrbitCamera(distance=surface_options["camera_distance"], swing=True,
+                                     far=4 * surface_options["camera_distance"])
+    viewer = viewer_core.Viewer("Video export", camera, width=args.width, height=args.height, vsync=False,
+                                hidden=True)
+
+    surface = SurfaceRenderer()
+    surface.set_cached(mesh_cache.get_mesh(objective, (lower, upper), (lower, upper), args.resolution,
+                                           color=surface_options["color"],
+                                           colormap_name=surface_options["colormap_name"],
+                                           dtype=swarm.dtype))
+    particles = ParticleLayer(color=(0.0, 1.0, 1.0), point_size=4)
+    viewer.scene.add_static("draw_axes", lambda: viewer_core.draw_axes(surface_options["axis_length"]))
+    viewer.scene.add("draw_surface", surface.draw)
+    viewer.scene.add("particles", particles.draw)
+
+    exporter = VideoExporter(args.output, args.width, args.height, args.fps, args.pbo_count)
+    start = time.perf_counter()
+    try:
+        while True:
+            particles.update(with_heights(swarm.positions, objective))
+            viewer.render()
+            # Чтение ставится в очередь до обмена буферов; готовый кадр - из PBO прошлых кадров
+            with viewer.profiler.phase("readback"):
+                exporter.capture()
+            viewer.swap()
+            viewer.end_frame()
+            if swarm.iteration >= args.iterations:
+                break
+            for _ in range(args.steps_per_frame):
+                swarm.nextIteration()
+    finally:
+        exporter.close()
+        viewer_core.terminate()
+    wall_time = time.perf_counter() - start
+    return {
+        "frames": exporter.frames,
+        "iterations": swarm.iteration,
+        "wall_time": wall_time,
+        "frames_per_sec": exporter.frames / wall_time if wall_time > 0 else float("inf"),
+        "global_best_value": float(swarm.global_best_value),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = export(args)
+    print(f"Кадров:              {report['frames']} -> {args.output}")
+    print(f"Итераций:            {report['iterations']}")
+    print(f"Время, с:            {report['wall_time']:.3f}")
+    print(f"Кадров/с:            {report['frames_per_sec']:.1f}")
+    print(f"Лучшее значение:     {report['global_best_value']:.6g}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import ast
+from functools import lru_cache
+
+import numpy as np
+
+# Движок выражений для пользовательских уравнений поверхностей.
+#
+# Строка разбирается один раз в AST, проверяется по белому списку узлов и
+# имён и компилируется в векторизованную функцию f(x, y). Готовые ядра
+# кэшируются по тексту выражения.
+
+VARIABLES = ("x", "y")
+
+FUNCTIONS = {
+    name: getattr(np, name)
+    for name in (
+        "sin", "cos", "tan", "arcsin", "arccos", "arctan", "arctan2",
+        "sinh", "cosh", "tanh", "exp", "log", "log10", "log2", "sqrt",
+        "abs", "absolute", "sign", "floor", "ceil", "minimum", "maximum",
+        "hypot", "power", "where", "logical_and",
+    )
+}
+
+CONSTANTS = {"pi": np.pi, "e": np.e}
+
+# Модули, через которые можно обращаться к функциям: np.sin(x)
+MODULE_ALIASES = ("np", "numpy")
+
+ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.IfExp, ast.Call,
+    ast.Name, ast.Load, ast.Constant, ast.Attribute,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.USub, ast.UAdd, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+)
+
+# Число элементов сетки, обрабатываемых за один блок
+CHUNK_ELEMENTS = 1 << 18
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+# Свёртка константных подвыражений в float64 (переполнение даёт inf, а не бесконечный расчёт)
+_FOLD_BINARY = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide,
+    ast.FloorDiv: np.floor_divide, ast.Mod: np.mod, ast.Pow: np.power,
+}
+_FOLD_UNARY = {ast.USub: np.negative, ast.UAdd: np.positive}
+
+
+def _call(name, *args):
+    return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=list(args), keywords=[])
+
+
+class _Validator(ast.NodeTransformer):
+    """Проверяет AST, заменяет np.func на имя функции и сворачивает константы.
+
+    Числа становятся float, константные подвыражения вычисляются сразу, а
+    условия приводятся к поэлементным: a if c else b -> where(c, a, b),
+    a < b < c -> logical_and(a < b, b < c).
+    """
+
+    def generic_visit(self, node):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ExpressionError(f"Недопустимая конструкция: {type(node).__name__}")
+        return super().generic_visit(node)
+
+    def visit_Attribute(self, node):
+        if not (isinstance(node.value, ast.Name) and node.value.id in MODULE_ALIASES):
+            raise ExpressionError("Допустимы только обращения вида np.<функция>")
+        if node.attr not in FUNCTIONS and node.attr not in CONSTANTS:
+            raise ExpressionError(f"Неизвестная функция: {node.attr}")
+        return ast.copy_location(ast.Name(id=node.attr, ctx=ast.Load()), node)
+
+    def visit_Name(self, node):
+        if node.id not in VARIABLES and node.id not in FUNCTIONS and node.id not in CONSTANTS:
+            raise ExpressionError(f"Неизвестное имя: {node.id}")
+        return node
+
+    def visit_Call(self, node):
+        if node.keywords:
+            raise ExpressionError("Именованные аргументы не поддерживаются")
+        node = self.generic_visit(node)
+        if not (isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS):
+            raise ExpressionError("Вызывать можно только функции из белого списка")
+        return node
+
+    def visit_Constant(self, node):
+        if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+            raise ExpressionError("Допустимы только числовые константы")
+        try:
+            value = float(node.value)
+        except OverflowError:
+            raise ExpressionError(f"Слишком большая константа: {node.value}") from None
+        return ast.copy_location(ast.Constant(value=value), node)
+
+    def visit_BinOp(self, node):
+        node = self.generic_visit(node)
+        if isinstance(node.left, ast.Constant) and isinstance(node.right, ast.Constant):
+            with np.errstate(all="ignore"):
+                value = _FOLD_BINARY[type(node.op)](np.float64(node.left.value), np.float64(node.right.value))
+            return self._folded(value, node)
+        return node
+
+    def visit_UnaryOp(self, node):
+        node = self.generic_visit(node)
+        if isinstance(node.operand, ast.Constant):
+            return self._folded(_FOLD_UNARY[type(node.op)](np.float64(node.operand.value)), node)
+        return node
+
+    def visit_Compare(self, node):
+        node = self.generic_visit(node)
+        operands = [node.left, *node.comparators]
+        pairs = [
+            ast.Compare(left=left, ops=[op], comparators=[right])
+            for left, op, right in zip(operands, node.ops, operands[1:])
+        ]
+        result = pairs[0]
+        for pair in pairs[1:]:
+            result = _call("logical_and", result, pair)
+        return ast.copy_location(result, node)
+
+    def visit_IfExp(self, node):
+        node = self.generic_visit(node)
+        return ast.copy_location(_call("where", node.test, node.body, node.orelse), node)
+
+    @staticmethod
+    def _folded(value, node):
+        if not np.isfinite(value):
+            raise ExpressionError("Константное подвыражение не является конечным числом")
+        return ast.copy_location(ast.Constant(value=float(value)), node)
+
+
+class CompiledExpression:
+    """Скомпилированное выражение f(x, y).
+
+    Вызов с массивом точек (..., 2) делает его целевой функцией в формате
+    objectives, поэтому одно выражение может строить и сетку поверхности,
+    и служить функцией для роя.
+    """
+
+    def __init__(self, text, function):
+        self.text = text
+        self._function = function
+        # Имя для ключей кэша сеток
+        self.__module__ = __name__
+        self.__qualname__ = f"expression[{text}]"
+
+    def __call__(self, points):
+        points = np.asarray(points)
+        return self.evaluate(points[..., 0], points[..., 1])
+
+    def evaluate(self, x, y):
+        """Значения в точности входов (float32 остаётся float32, целые - в float64)."""
+        dtype = np.result_type(x, y, np.float32)
+        result = self._function(x, y)
+        return np.broadcast_to(result, np.broadcast(x, y).shape).astype(dtype)
+
+    def evaluate_grid(self, x_vals, y_vals, chunk_elements=CHUNK_ELEMENTS):
+        """Значения на сетке meshgrid(x_vals, y_vals), посчитанные блоками строк."""
+        x_vals = np.asarray(x_vals, dtype=np.float64)
+        y_vals = np.asarray(y_vals, dtype=np.float64)
+        z = np.empty((len(y_vals), len(x_vals)))
+        rows = max(1, chunk_elements // max(len(x_vals), 1))
+        x_row = x_vals[None, :]
+        for start in range(0, len(y_vals), rows):
+            y_block = y_vals[start:start + rows, None]
+            z[start:start + rows] = self.evaluate(x_row, y_block)
+        return z
+
+
+@lru_cache(maxsize=64)
+def compile_expression(text):
+    """Разбирает и компилирует выражение; результат кэшируется по тексту."""
+    try:
+        tree = ast.parse(text.strip(), mode="eval")
+    except SyntaxError as error:
+        raise ExpressionError(f"Синтаксическая ошибка: {error.msg}") from error
+    tree = _Validator().visit(tree)
+
+    # lambda x, y: <выражение>
+    arguments = ast.arguments(
+        posonlyargs=[], args=[ast.arg(arg=name) for name in VARIABLES],
+        kwonlyargs=[], kw_defaults=[], defaults=[],
+    )
+    function_tree = ast.Expression(body=ast.Lambda(args=arguments, body=tree.body))
+    ast.fix_missing_locations(function_tree)
+
+    namespace = {"__builtins__": {}, **FUNCTIONS, **CONSTANTS}
+    function = eval(compile(function_tree, "<expression>", "eval"), namespace)
+    return CompiledExpression(text, function)
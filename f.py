@@ -1,7 +1,10 @@
 import numpy as np
-from particleswarm import Swarm
 
-class SwarmSchwefel(Swarm):
+import objectives
+from swarm_x2 import SwarmX2
+
+
+class SwarmSchwefel(SwarmX2):
     def __init__(
         self,
         swarmsize: int,
@@ -10,6 +13,9 @@ class SwarmSchwefel(Swarm):
         currentVelocityRatio: float,
         localVelocityRatio: float,
         globalVelocityRatio: float,
+        seed: int | None = None,
+        surrogate=None,
+        dtype=np.float64,
     ):
         super().__init__(
             swarmsize,
@@ -18,9 +24,36 @@ class SwarmSchwefel(Swarm):
             currentVelocityRatio,
             localVelocityRatio,
             globalVelocityRatio,
+            seed=seed,
+            surrogate=surrogate,
+            dtype=dtype,
         )
 
-    def _finalFunc(self, position):
-        function = 418.9829 * len(position) - sum(position * np.sin(np.sqrt(np.abs(position))))
-        penalty = self._getPenalty(position, 10000.0)
+    @property
+    def globalBestFinalFunc(self):
+        return self.global_best_value
+
+    @property
+    def globalBestPosition(self):
+        return self.global_best_position
+
+    def _updateVelocity(self):
+        # Канонический PSO с коэффициентом сжатия
+        veloRatio = self.localVelocityRatio + self.globalVelocityRatio
+        # Скаляр Python, чтобы не повышать точность массивов float32
+        commonRatio = float(2.0 * self.currentVelocityRatio / np.abs(2.0 - veloRatio - np.sqrt(veloRatio**2 - 4.0 * veloRatio)))
+
+        r1 = self.rng.random(self.positions.shape, dtype=self.dtype)
+        r2 = self.rng.random(self.positions.shape, dtype=self.dtype)
+        self.velocities *= commonRatio
+        self.velocities += commonRatio * self.localVelocityRatio * r1 * (self.best_positions - self.positions)
+        self.velocities += commonRatio * self.globalVelocityRatio * r2 * (self.global_best_position - self.positions)
+
+    def _updatePosition(self):
+        # Выход за границы не обрезается, а штрафуется в _finalFunc
+        self.positions += self.velocities
+
+    def _finalFunc(self, positions):
+        function = objectives.schwefel(positions)
+        penalty = self._getPenalty(positions, 10000.0)
         return function + penalty
@@ -0,0 +1,124 @@
+import contextlib
+import csv
+import time
+
+import numpy as np
+
+# Пустой контекст для выключенного профилировщика - без выделения памяти
+_DISABLED_PHASE = contextlib.nullcontext()
+
+
+class _Phase:
+    __slots__ = ("_profiler", "_column", "_start")
+
+    def __init__(self, profiler, column):
+        self._profiler = profiler
+        self._column = column
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._profiler._add(self._column, time.perf_counter() - self._start)
+        return False
+
+
+class FrameProfiler:
+    """Замеры фаз кадра с кольцевым буфером последних capacity кадров.
+
+    with profiler.phase("draw_surface"): ... - время фазы в текущем кадре;
+    end_frame() закрывает кадр. В выключенном состоянии phase() возвращает
+    общий пустой контекст.
+    """
+
+    def __init__(self, capacity=600, enabled=False, report_interval=1.0):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.report_interval = report_interval
+        self._columns = {}
+        self._times = np.full((capacity, 8), np.nan)
+        self._row = 0
+        self._frames = 0
+        self._last_report = time.monotonic()
+
+    @property
+    def phases(self):
+        return list(self._columns)
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        print(f"Профилировщик кадров {'включён' if self.enabled else 'выключен'}")
+
+    def phase(self, name):
+        if not self.enabled:
+            return _DISABLED_PHASE
+        return _Phase(self, self._column(name))
+
+    def add(self, name, seconds):
+        """Добавляет время, измеренное вне кадра (например, в потоке роя)."""
+        if self.enabled:
+            self._add(self._column(name), seconds)
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self._frames += 1
+        self._row = self._frames % self.capacity
+        self._times[self._row] = np.nan
+
+    def percentiles(self, quantiles=(50, 95, 99)):
+        """{фаза: [p50, p95, p99]} в миллисекундах по накопленным кадрам."""
+        filled = self._times[self._completed_rows()[1]]
+        result = {}
+        for name, column in self._columns.items():
+            values = filled[:, column]
+            values = values[~np.isnan(values)]
+            if len(values):
+                result[name] = (np.percentile(values, quantiles) * 1e3).tolist()
+        return result
+
+    def summary(self):
+        parts = [f"{name}: {p50:.2f}/{p95:.2f}/{p99:.2f}" for name, (p50, p95, p99) in self.percentiles().items()]
+        return "p50/p95/p99, мс - " + "; ".join(parts)
+
+    def maybe_report(self):
+        """Печатает сводку не чаще раза в report_interval секунд."""
+        if not self.enabled or self._frames == 0:
+            return
+        now = time.monotonic()
+        if now - self._last_report >= self.report_interval:
+            self._last_report = now
+            print(self.summary())
+
+    def dump_csv(self, path):
+        """Сохраняет кадры из буфера в CSV (по столбцу на фазу, мс)."""
+        frames, rows = self._completed_rows()
+        if len(frames) == 0:
+            return
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame"] + self.phases)
+            for frame, row in zip(frames, rows):
+                values = self._times[row, [self._columns[name] for name in self.phases]] * 1e3
+                writer.writerow([frame] + ["" if np.isnan(value) else f"{value:.4f}" for value in values])
+
+    def _completed_rows(self):
+        # Номера завершённых кадров в буфере и их строки (строка текущего кадра исключена)
+        count = min(self._frames, self.capacity - 1)
+        frames = np.arange(self._frames - count, self._frames)
+        return frames, frames % self.capacity
+
+    def _column(self, name):
+        column = self._columns.get(name)
+        if column is None:
+            column = len(self._columns)
+            if column >= self._times.shape[1]:
+                extra = np.full((self.capacity, self._times.shape[1]), np.nan)
+                self._times = np.concatenate((self._times, extra), axis=1)
+            self._columns[name] = column
+        return column
+
+    def _add(self, column, seconds):
+        current = self._times[self._row, column]
+        self._times[self._row, column] = seconds if np.isnan(current) else current + seconds
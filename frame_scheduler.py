@@ -0,0 +1,68 @@
+import time
+
+
+class FrameScheduler:
+    """Темп кадров и адаптивное число итераций роя на кадр.
+
+    Каждый кадр измеряется время работы (от begin_frame до work_done, без
+    ожидания вертикальной синхронизации). Если до бюджета кадра
+    1 / target_fps остаётся запас, число итераций на кадр растёт по оценке
+    времени итерации; если кадр не уложился в бюджет - уменьшается вдвое.
+    Без вертикальной синхронизации (pace=True) end_frame досыпает до конца
+    кадра, освобождая процессор потоку роя.
+    """
+
+    def __init__(self, target_fps=60, runner=None, steps=1, min_steps=1, max_steps=10_000, pace=False):
+        self.target_fps = target_fps
+        self.runner = runner
+        self.steps = steps
+        self.min_steps = min_steps
+        self.max_steps = max_steps
+        self.pace = pace
+        self.work_time = 0.0
+        self._frame_start = time.perf_counter()
+        self._apply()
+
+    def attach(self, runner):
+        """Подключает SimulationRunner, которому задаётся число итераций на кадр."""
+        self.runner = runner
+        self._apply()
+
+    @property
+    def budget(self):
+        return 1.0 / self.target_fps
+
+    def begin_frame(self):
+        self._frame_start = time.perf_counter()
+
+    def work_done(self):
+        """Отмечает конец работы кадра (перед обменом буферов)."""
+        self.work_time = time.perf_counter() - self._frame_start
+
+    def end_frame(self):
+        self._adjust()
+        if self.pace:
+            remaining = self._frame_start + self.budget - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def _adjust(self):
+        budget = self.budget
+        if self.work_time > budget:
+            # Кадр не уложился - быстро уменьшаем нагрузку
+            self.steps = max(self.min_steps, self.steps // 2)
+        elif self.work_time < 0.8 * budget:
+            iteration_time = self.runner.last_iteration_time if self.runner is not None else 0.0
+            spare = 0.8 * budget - self.work_time
+            # Растём на половину оценённого запаса, чтобы не раскачиваться
+            grow = int(0.5 * spare / iteration_time) if iteration_time > 0 else self.steps
+            limit = self.max_steps
+            if iteration_time > 0:
+                # Поток роя работает параллельно кадру: больше budget / iteration_time не успеть
+                limit = min(limit, max(self.min_steps, int(budget / iteration_time) + 1))
+            self.steps = min(limit, self.steps + max(1, grow))
+        self._apply()
+
+    def _apply(self):
+        if self.runner is not None:
+            self.runner.steps_per_frame = self.steps
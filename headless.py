@@ -0,0 +1,190 @@
+"""Оптимизация роем частиц без OpenGL, GLFW и VTK.
+
+Пример запуска:
+    python headless.py --swarm schwefel --swarmsize 5000 --dimension 10 --iterations 1000
+"""
+import argparse
+import time
+
+from checkpoint import CheckpointWriter
+from expressions import compile_expression
+from f import SwarmSchwefel
+from islands import TOPOLOGIES, run_islands
+from precision import PRECISIONS, print_validation, resolve_dtype, validate
+from stopping import REASONS, StoppingCriteria
+from surrogate import SurrogateScreen
+from swarm_x2 import SwarmX2
+from trajectory import TrajectoryRecorder
+
+SWARMS = {
+    "x2": SwarmX2,
+    "schwefel": SwarmSchwefel,
+}
+
+# Границы области поиска по умолчанию для каждого роя
+DEFAULT_BOUNDS = {
+    "x2": (-100.0, 100.0),
+    "schwefel": (-500.0, 500.0),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Оптимизация роем частиц без визуализации")
+    parser.add_argument("--swarm", choices=sorted(SWARMS), default="x2", help="оптимизируемая функция")
+    parser.add_argument("--swarmsize", type=int, default=200, help="число частиц")
+    parser.add_argument("--dimension", type=int, default=2, help="размерность задачи")
+    parser.add_argument("--min", type=float, default=None, help="нижняя граница по каждой координате")
+    parser.add_argument("--max", type=float, default=None, help="верхняя граница по каждой координате")
+    parser.add_argument("--iterations", type=int, default=500, help="число итераций")
+    parser.add_argument("--current", type=float, default=0.1, help="currentVelocityRatio")
+    parser.add_argument("--local", type=float, default=1.0, help="localVelocityRatio")
+    parser.add_argument("--global", dest="global_", type=float, default=5.0, help="globalVelocityRatio")
+    parser.add_argument("--expression", default=None, help="своя функция f(x, y) для роя x2, например \"x**2 + np.sin(y)\"")
+    parser.add_argument("--seed", type=int, default=None, help="зерно генератора случайных чисел")
+    parser.add_argument("--precision", choices=sorted(PRECISIONS), default="float64", help="точность массивов роя")
+    parser.add_argument("--validate-precision", action="store_true", help="сравнить float32 и float64 на тестовых функциях")
+    parser.add_argument("--checkpoint", default=None, help="файл контрольной точки роя")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="итераций между контрольными точками")
+    parser.add_argument("--resume", action="store_true", help="продолжить с контрольной точки, если она есть")
+    parser.add_argument("--surrogate", action="store_true", help="отбор частиц по суррогатной RBF-модели")
+    parser.add_argument("--surrogate-window", type=int, default=400, help="число последних точек в суррогатной модели")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="минимальное улучшение для критерия застоя")
+    parser.add_argument("--patience", type=int, default=None, help="остановка после стольких итераций без улучшения")
+    parser.add_argument("--collapse-radius", type=float, default=None, help="остановка, когда рой сжался до радиуса")
+    parser.add_argument("--target", type=float, default=None, help="остановка при достижении значения функции")
+    parser.add_argument("--time-budget", type=float, default=None, help="ограничение времени расчёта, с")
+    parser.add_argument("--max-evaluations", type=int, default=None, help="ограничение числа вычислений функции")
+    parser.add_argument("--record", default=None, help="каталог для записи траектории роя")
+    parser.add_argument("--islands", type=int, default=1, help="число роёв-островов в отдельных процессах")
+    parser.add_argument("--migration-interval", type=int, default=20, help="итераций между миграциями")
+    parser.add_argument("--migrants", type=int, default=5, help="число мигрирующих частиц")
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="ring", help="топология миграции")
+    args = parser.parse_args(argv)
+    if args.expression is not None and (args.swarm != "x2" or args.dimension != 2):
+        parser.error("--expression работает только с --swarm x2 и --dimension 2")
+    stopping_options = (args.patience, args.collapse_radius, args.target, args.time_budget, args.max_evaluations)
+    if args.islands > 1 and any(option is not None for option in stopping_options):
+        parser.error("критерии досрочной остановки работают только без --islands")
+    if args.islands > 1 and (args.checkpoint is not None or args.resume or args.record is not None):
+        parser.error("--checkpoint, --resume и --record работают только без --islands")
+    return args
+
+
+def create_swarm(args):
+    lower, upper = DEFAULT_BOUNDS[args.swarm]
+    if args.min is not None:
+        lower = args.min
+    if args.max is not None:
+        upper = args.max
+
+    options = {"seed": args.seed, "dtype": resolve_dtype(args.precision)}
+    if args.expression is not None:
+        options["objective"] = compile_expression(args.expression)
+    if args.surrogate:
+        options["surrogate"] = SurrogateScreen(args.dimension, args.surrogate_window, seed=args.seed)
+
+    return SWARMS[args.swarm](
+        args.swarmsize,
+        [lower] * args.dimension,
+        [upper] * args.dimension,
+        args.current,
+        args.local,
+        args.global_,
+        **options,
+    )
+
+
+def create_stopping(args):
+    return StoppingCriteria(
+        tolerance=args.tolerance,
+        patience=args.patience,
+        collapse_radius=args.collapse_radius,
+        target_value=args.target,
+        time_budget=args.time_budget,
+        max_evaluations=args.max_evaluations,
+    )
+
+
+def run(swarm, iterations, checkpoint=None, recorder=None, stopping=None):
+    """Выполняет итерации роя и возвращает отчёт о производительности."""
+    start_iteration = swarm.iteration
+    start_evaluations = swarm.evaluations
+    start_surrogate = swarm.surrogate.surrogate_evaluations if swarm.surrogate is not None else 0
+    start = time.perf_counter()
+    if stopping is not None:
+        stopping.start(swarm)
+    if recorder is not None:
+        recorder.record(swarm)
+    stop_reason = "max_iterations"
+    for _ in range(iterations):
+        swarm.nextIteration()
+        if checkpoint is not None:
+            checkpoint.maybe_save()
+        if recorder is not None:
+            recorder.record(swarm)
+        if stopping is not None and stopping.check(swarm) is not None:
+            stop_reason = stopping.reason
+            break
+    if checkpoint is not None:
+        checkpoint.save()
+    if recorder is not None:
+        recorder.close()
+    wall_time = time.perf_counter() - start
+
+    iterations = swarm.iteration - start_iteration
+    evaluations = swarm.evaluations - start_evaluations
+    return {
+        "iterations": iterations,
+        "stop_reason": stop_reason,
+        "evaluations": evaluations,
+        "wall_time": wall_time,
+        "iterations_per_sec": iterations / wall_time if wall_time > 0 else float("inf"),
+        "evaluations_per_sec": evaluations / wall_time if wall_time > 0 else float("inf"),
+        "global_best_value": float(swarm.global_best_value),
+        "surrogate_evaluations": (swarm.surrogate.surrogate_evaluations - start_surrogate
+                                  if swarm.surrogate is not None else 0),
+        "global_best_position": swarm.global_best_position.tolist(),
+    }
+
+
+def print_report(report):
+    print(f"Итераций:            {report['iterations']}")
+    if "stop_reason" in report:
+        print(f"Остановка:           {REASONS[report['stop_reason']]}")
+    print(f"Вычислений функции:  {report['evaluations']}")
+    if report.get("surrogate_evaluations"):
+        print(f"Прогнозов модели:    {report['surrogate_evaluations']}")
+    print(f"Время, с:            {report['wall_time']:.3f}")
+    print(f"Итераций/с:          {report['iterations_per_sec']:.1f}")
+    print(f"Вычислений/с:        {report['evaluations_per_sec']:.0f}")
+    print(f"Лучшее значение:     {report['global_best_value']:.6g}")
+    if "islands" in report:
+        print(f"Островов:            {report['islands']}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.validate_precision:
+        report = validate(args.dimension, args.swarmsize, args.iterations, 0 if args.seed is None else args.seed)
+        print_validation(report)
+        return report
+    if args.islands > 1:
+        report = run_islands(args, args.islands, args.migration_interval, args.migrants, args.topology)
+    else:
+        swarm = create_swarm(args)
+        checkpoint = None
+        if args.checkpoint is not None:
+            checkpoint = CheckpointWriter(swarm, args.checkpoint, args.checkpoint_every)
+            if args.resume and checkpoint.resume():
+                print(f"Продолжение с итерации {swarm.iteration}")
+        iterations = max(args.iterations - swarm.iteration, 0)
+        recorder = None
+        if args.record is not None:
+            recorder = TrajectoryRecorder(args.record, args.swarmsize, args.dimension, iterations + 1)
+        report = run(swarm, iterations, checkpoint, recorder, create_stopping(args))
+    print_report(report)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Островная модель: несколько роёв в отдельных процессах, которые раз в
+# migration_interval итераций обмениваются лучшими частицами. Обмен идёт
+# через общую память, без сериализации массивов.
+
+TOPOLOGIES = ("ring", "full")
+
+
+def migration_sources(topology, index, islands):
+    """Номера островов, от которых остров index получает мигрантов."""
+    if islands < 2:
+        return []
+    if topology == "ring":
+        return [(index - 1) % islands]
+    if topology == "full":
+        return [i for i in range(islands) if i != index]
+    raise ValueError(f"Неизвестная топология: {topology}")
+
+
+class SharedArray:
+    """Массив numpy в именованном блоке общей памяти."""
+
+    def __init__(self, shape, dtype=np.float64, name=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        size = max(int(np.prod(self.shape)) * self.dtype.itemsize, 1)
+        self._shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def describe(self):
+        """Параметры для подключения к массиву из другого процесса."""
+        return self.shape, self.dtype.str, self.name
+
+    @classmethod
+    def attach(cls, description):
+        shape, dtype, name = description
+        return cls(shape, dtype, name)
+
+    def close(self):
+        self.array = None
+        self._shm.close()
+
+    def unlink(self):
+        self._shm.unlink()
+
+
+def _island_worker(index, args, islands, migration_interval, migrants, topology, shared, barrier):
+    # headless сам импортирует этот модуль, поэтому импорт внутри функции
+    from headless import create_swarm
+
+    migrant_positions, migrant_values, results = (SharedArray.attach(d) for d in shared)
+    try:
+        args.seed = None if args.seed is None else args.seed + index
+        swarm = create_swarm(args)
+        sources = migration_sources(topology, index, islands)
+
+        remaining = args.iterations
+        while remaining > 0:
+            steps = min(migration_interval, remaining)
+            for _ in range(steps):
+                swarm.nextIteration()
+            remaining -= steps
+
+            # Публикуем лучшие частицы и ждём остальные острова
+            positions, values = swarm.bestParticles(migrants)
+            migrant_positions.array[index] = positions
+            migrant_values.array[index] = values
+            barrier.wait()
+
+            if sources:
+                incoming_positions = migrant_positions.array[sources].reshape(-1, swarm.dimension)
+                incoming_values = migrant_values.array[sources].ravel()
+                order = np.argsort(incoming_values)[:migrants]
+                swarm.replaceWorst(incoming_positions[order], incoming_values[order])
+            # Слоты нельзя перезаписывать, пока их читают соседи
+            barrier.wait()
+
+        results.array[index, 0] = swarm.global_best_value
+        results.array[index, 1] = swarm.evaluations
+        results.array[index, 2:] = swarm.global_best_position
+    except BaseException:
+        # Разблокируем остальные острова, ожидающие на барьере
+        barrier.abort()
+        raise
+    finally:
+        for array in (migrant_positions, migrant_values, results):
+            array.close()
+
+
+def run_islands(args, islands, migration_interval=20, migrants=5, topology="ring"):
+    """Запускает островную модель и возвращает отчёт в формате headless.run."""
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Неизвестная топология: {topology}")
+    migrants = max(1, min(migrants, args.swarmsize))
+
+    migrant_positions = SharedArray((islands, migrants, args.dimension))
+    migrant_values = SharedArray((islands, migrants))
+    results = SharedArray((islands, 2 + args.dimension))
+    shared = [array.describe() for array in (migrant_positions, migrant_values, results)]
+
+    context = mp.get_context()
+    barrier = context.Barrier(islands)
+    processes = [
+        context.Process(
+            target=_island_worker,
+            args=(index, args, islands, migration_interval, migrants, topology, shared, barrier),
+        )
+        for index in range(islands)
+    ]
+
+    try:
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        wall_time = time.perf_counter() - start
+
+        if any(process.exitcode != 0 for process in processes):
+            raise RuntimeError("Один из островов завершился с ошибкой")
+
+        table = results.array.copy()
+    finally:
+        for array in (migrant_positions, migrant_values, results):
+            array.close()
+            array.unlink()
+
+    best = int(np.argmin(table[:, 0]))
+    evaluations = int(table[:, 1].sum())
+    return {
+        "iterations": args.iterations,
+        "evaluations": evaluations,
+        "wall_time": wall_time,
+        "iterations_per_sec": args.iterations / wall_time if wall_time > 0 else float("inf"),
+        "evaluations_per_sec": evaluations / wall_time if wall_time > 0 else float("inf"),
+        "global_best_value": float(table[best, 0]),
+        "global_best_position": table[best, 2:].tolist(),
+        "islands": islands,
+        "island_best_values": table[:, 0].tolist(),
+    }
@@ -0,0 +1,236 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import mesh
+
+# Адаптивная поверхность с уровнями детализации (LOD).
+#
+# Область делится квадродеревом. Узел делится, пока его экранная ошибка
+# (отклонение функции от билинейного приближения по углам, делённое на
+# расстояние до камеры) больше допуска и не исчерпан бюджет треугольников.
+# Соседние листья отличаются не больше чем на один уровень, а на границе с
+# более мелким соседом лист добавляет середину ребра - швов нет.
+# Перестроение идёт в фоновом потоке; готовая сетка подменяет старую.
+
+SAMPLES = 5  # Число отсчётов по стороне узла при оценке ошибки
+
+
+def camera_in_model_space(eye, rotation_x, rotation_y):
+    """Положение камеры в координатах модели после glRotatef(rx, X) и glRotatef(ry, Y)."""
+    ax, ay = np.radians(rotation_x), np.radians(rotation_y)
+    rotate_x = np.array([[1, 0, 0], [0, np.cos(ax), -np.sin(ax)], [0, np.sin(ax), np.cos(ax)]])
+    rotate_y = np.array([[np.cos(ay), 0, np.sin(ay)], [0, 1, 0], [-np.sin(ay), 0, np.cos(ay)]])
+    return rotate_y.T @ rotate_x.T @ np.asarray(eye, dtype=np.float64)
+
+
+def _key(level, ix, iy):
+    return (level << 48) | (ix << 24) | iy
+
+
+class LodTerrain:
+    """Квадродерево поверхности целевой функции с зависящей от камеры детализацией."""
+
+    def __init__(self, objective, extent=(-500.0, 500.0), max_level=10, triangle_budget=30000,
+                 pixel_tolerance=2.0, projection_scale=724.0, colormap_name="classic"):
+        self.objective = objective
+        self.colormap_name = colormap_name
+        self.extent = extent
+        self.max_level = max_level
+        self.triangle_budget = triangle_budget
+        self.pixel_tolerance = pixel_tolerance
+        # Пикселей на единицу длины на расстоянии 1: высота окна / (2 * tg(fov / 2))
+        self.projection_scale = projection_scale
+
+        self._errors = {}
+        self._camera = None
+        # Один рабочий поток: кэш ошибок узлов используется только им
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lod")
+        self._pending = None
+
+        # Общий диапазон высот для стабильной раскраски при перестроении
+        grid = np.linspace(extent[0], extent[1], 129)
+        X, Y = np.meshgrid(grid, grid)
+        Z = objective(np.stack((X, Y), axis=-1))
+        self.z_min, self.z_max = float(Z.min()), float(Z.max())
+
+        self.vertices = None
+        self.colors = None
+        self.indices = None
+
+    @property
+    def size(self):
+        return self.extent[1] - self.extent[0]
+
+    def update(self, camera):
+        """Запускает перестроение, если камера заметно сместилась.
+
+        Сетка строится в рабочем потоке, кадр не ждёт. Возвращает True, когда
+        готова новая сетка (vertices, colors, indices уже заменены).
+        """
+        ready = False
+        if self._pending is not None and self._pending.done():
+            self.vertices, self.colors, self.indices = self._pending.result()
+            self._pending = None
+            ready = True
+        if self._pending is not None:
+            return ready
+
+        camera = np.asarray(camera, dtype=np.float64)
+        if self._camera is not None:
+            moved = np.linalg.norm(camera - self._camera)
+            if moved < 0.05 * max(np.linalg.norm(self._camera), 1.0):
+                return ready
+        self._camera = camera
+        self._pending = self._executor.submit(self.build, camera)
+        return ready
+
+    def set_colormap(self, name):
+        """Смена цветовой карты: цвета запекаются в вершины, поэтому сетка строится заново."""
+        if name == self.colormap_name:
+            return
+        self.colormap_name = name
+        # Следующий update() запустит перестроение независимо от смещения камеры
+        self._camera = None
+
+    def build(self, camera):
+        """Строит сетку для положения камеры; возвращает (vertices, colors, indices)."""
+        split = self._refine(camera)
+        self._balance(split)
+        return self._emit(split)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _node_errors(self, nodes):
+        """Ошибка билинейного приближения и высота центра для узлов (с кэшем)."""
+        missing = [node for node in nodes if node not in self._errors]
+        if missing:
+            if len(self._errors) > 200_000:
+                self._errors.clear()
+            levels, ix, iy = np.array(missing, dtype=np.int64).T
+            size = self.size / (1 << levels)
+            u = np.linspace(0.0, 1.0, SAMPLES)
+            x = self.extent[0] + (ix * size)[:, None, None] + size[:, None, None] * u[None, None, :]
+            y = self.extent[0] + (iy * size)[:, None, None] + size[:, None, None] * u[None, :, None]
+            x, y = np.broadcast_arrays(x, y)
+            values = self.objective(np.stack((x, y), axis=-1))
+
+            v00, v10 = values[:, 0, 0, None, None], values[:, 0, -1, None, None]
+            v01, v11 = values[:, -1, 0, None, None], values[:, -1, -1, None, None]
+            s, t = u[None, None, :], u[None, :, None]
+            bilinear = (1 - s) * (1 - t) * v00 + s * (1 - t) * v10 + (1 - s) * t * v01 + s * t * v11
+            errors = np.abs(values - bilinear).max(axis=(1, 2))
+            centers = values[:, SAMPLES // 2, SAMPLES // 2]
+            for node, error, center in zip(missing, errors, centers):
+                self._errors[node] = (float(error), float(center))
+        return [self._errors[node] for node in nodes]
+
+    def _priority(self, node, error, center_z, camera):
+        level, ix, iy = node
+        size = self.size / (1 << level)
+        center = np.array([self.extent[0] + (ix + 0.5) * size, self.extent[0] + (iy + 0.5) * size, center_z])
+        distance = max(np.linalg.norm(camera - center) - 0.7071 * size, 1e-3 * self.size)
+        return error * self.projection_scale / distance
+
+    def _refine(self, camera):
+        root = (0, 0, 0)
+        (error, center_z), = self._node_errors([root])
+        heap = [(-self._priority(root, error, center_z, camera), root)]
+        split = set()
+        leaves = 1
+        # Запас бюджета на листья, добавляемые балансировкой
+        leaf_budget = 0.75 * self.triangle_budget / 8
+
+        while heap:
+            priority, node = heapq.heappop(heap)
+            if -priority <= self.pixel_tolerance or leaves + 3 > leaf_budget:
+                break
+            level, ix, iy = node
+            if level >= self.max_level:
+                continue
+            split.add(_key(*node))
+            leaves += 3
+
+            children = [(level + 1, 2 * ix + dx, 2 * iy + dy) for dy in (0, 1) for dx in (0, 1)]
+            for child, (error, center_z) in zip(children, self._node_errors(children)):
+                heapq.heappush(heap, (-self._priority(child, error, center_z, camera), child))
+        return split
+
+    def _leaves(self, split):
+        if not split:
+            return [(0, 0, 0)]
+        leaves = []
+        for key in split:
+            level, ix, iy = key >> 48, (key >> 24) & 0xFFFFFF, key & 0xFFFFFF
+            for dy in (0, 1):
+                for dx in (0, 1):
+                    child = (level + 1, 2 * ix + dx, 2 * iy + dy)
+                    if _key(*child) not in split:
+                        leaves.append(child)
+        return leaves
+
+    def _balance(self, split):
+        """Делит узлы, пока соседние листья не отличаются больше чем на уровень."""
+        changed = True
+        while changed:
+            changed = False
+            for level, ix, iy in self._leaves(split):
+                if level < 2:
+                    continue
+                count = 1 << level
+                for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                    nx, ny = ix + dx, iy + dy
+                    if not (0 <= nx < count and 0 <= ny < count):
+                        continue
+                    # Родитель соседа (уровень level - 1) должен существовать
+                    parent_level, px, py = level - 2, nx >> 2, ny >> 2
+                    if _key(parent_level, px, py) in split:
+                        continue
+                    while parent_level >= 0:
+                        key = _key(parent_level, px, py)
+                        if key not in split:
+                            split.add(key)
+                            changed = True
+                        parent_level, px, py = parent_level - 1, px >> 1, py >> 1
+
+    def _emit(self, split):
+        leaves = np.array(self._leaves(split), dtype=np.int64)
+        levels, ix, iy = leaves.T
+        count = 1 << levels
+        size = self.size / count
+        x0 = self.extent[0] + ix * size
+        y0 = self.extent[0] + iy * size
+        half = size / 2
+
+        # Центр и 8 точек периметра против часовой стрелки:
+        # угол, середина нижнего ребра, угол, середина правого, ...
+        offsets = np.array([[1, 1], [0, 0], [1, 0], [2, 0], [2, 1], [2, 2], [1, 2], [0, 2], [0, 1]])
+        points = np.empty((len(leaves), 9, 2))
+        points[..., 0] = x0[:, None] + offsets[None, :, 0] * half[:, None]
+        points[..., 1] = y0[:, None] + offsets[None, :, 1] * half[:, None]
+
+        # Середина ребра нужна, если сосед по этому ребру мельче
+        split_keys = np.fromiter(split, dtype=np.int64, count=len(split))
+        active = np.ones((len(leaves), 8), dtype=bool)
+        for slot, (dx, dy) in zip((1, 3, 5, 7), ((0, -1), (1, 0), (0, 1), (-1, 0))):
+            nx, ny = ix + dx, iy + dy
+            inside = (nx >= 0) & (nx < count) & (ny >= 0) & (ny < count)
+            keys = (levels << 48) | (np.clip(nx, 0, None) << 24) | np.clip(ny, 0, None)
+            active[:, slot] = inside & np.isin(keys, split_keys)
+
+        # Следующая активная точка периметра для каждой позиции
+        following = np.zeros((len(leaves), 8), dtype=np.int64)
+        positions = np.arange(8)
+        for offset in range(7, 0, -1):
+            following = np.where(np.roll(active, -offset, axis=1), (positions + offset) % 8, following)
+
+        leaf, slot = np.nonzero(active)
+        base = leaf * 9
+        triangles = np.stack((base, base + 1 + slot, base + 1 + following[leaf, slot]), axis=-1)
+
+        heights = self.objective(points)
+        vertices = np.concatenate((points, heights[..., None]), axis=-1).reshape(-1, 3).astype(np.float32)
+        colors = mesh.height_colors(heights.ravel(), self.z_min, self.z_max, self.colormap_name)
+        return vertices, colors, triangles.astype(np.uint32).ravel()
@@ -0,0 +1,33 @@
+import numpy as np
+
+import colormap
+
+# Вспомогательные функции для построения сеток поверхностей (без OpenGL)
+
+
+def grid_indices(rows, cols):
+    """Индексы треугольников регулярной сетки rows x cols, по два на ячейку."""
+    corner = (np.arange(rows - 1)[:, None] * cols + np.arange(cols - 1)[None, :]).ravel()
+    triangles = np.empty((corner.size, 2, 3), dtype=np.uint32)
+    triangles[:, 0, 0] = corner
+    triangles[:, 0, 1] = corner + 1
+    triangles[:, 0, 2] = corner + cols
+    triangles[:, 1, 0] = corner + 1
+    triangles[:, 1, 1] = corner + cols + 1
+    triangles[:, 1, 2] = corner + cols
+    return triangles.ravel()
+
+
+def grid_vertices(X, Y, Z, dtype=np.float32):
+    """Массив вершин (rows * cols, 3) для сетки meshgrid в точности dtype."""
+    return np.stack((X, Y, Z), axis=-1).reshape(-1, 3).astype(dtype, copy=False)
+
+
+def height_colors(Z, z_min=None, z_max=None, colormap_name="classic"):
+    """Цвета вершин по высоте через цветовую карту (по умолчанию (0.2, z, 1 - z))."""
+    return colormap.apply_colormap(Z, colormap_name, z_min, z_max)
+
+
+def constant_colors(shape, color):
+    """Одинаковый цвет для всех вершин сетки."""
+    return np.broadcast_to(np.asarray(color, dtype=np.float32), (int(np.prod(shape)), 3)).copy()
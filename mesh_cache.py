@@ -0,0 +1,102 @@
+import hashlib
+import os
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+import mesh
+
+# Готовая сетка поверхности: координаты, цвета вершин и индексы треугольников
+Mesh = namedtuple("Mesh", ["key", "X", "Y", "Z", "colors", "indices"])
+
+
+def _objective_name(objective):
+    return f"{objective.__module__}.{objective.__qualname__}"
+
+
+class MeshCache:
+    """Кэш сеток поверхностей с вытеснением LRU.
+
+    Ключ - (целевая функция, диапазоны x/y, разрешение, цвет или цветовая
+    карта). Большие сетки (от persist_threshold вершин) сохраняются в
+    cache_dir в виде .npy и при повторном запуске открываются через
+    memory-map без пересчёта.
+    """
+
+    def __init__(self, capacity=8, cache_dir=None, persist_threshold=250_000):
+        self.capacity = capacity
+        self.cache_dir = cache_dir
+        self.persist_threshold = persist_threshold
+        self._meshes = OrderedDict()
+
+    def get(self, objective, x_range, y_range, resolution, color=None, colormap_name="classic", dtype=np.float64):
+        """Возвращает сетку из кэша, с диска или строит новую (координаты и высоты в dtype)."""
+        if np.isscalar(resolution):
+            resolution = (resolution, resolution)
+        dtype = np.dtype(dtype)
+        key = (_objective_name(objective), tuple(x_range), tuple(y_range), tuple(resolution),
+               colormap_name if color is None else tuple(color), dtype.name)
+
+        cached = self._meshes.get(key)
+        if cached is not None:
+            self._meshes.move_to_end(key)
+            return cached
+
+        x = np.linspace(x_range[0], x_range[1], resolution[0], dtype=dtype)
+        y = np.linspace(y_range[0], y_range[1], resolution[1], dtype=dtype)
+        X, Y = np.meshgrid(x, y)
+
+        loaded = self._load(key)
+        if loaded is not None:
+            Z, colors, indices = loaded
+        else:
+            Z, colors, indices = self._build(objective, X, Y, color, colormap_name)
+            if self.cache_dir is not None and Z.size >= self.persist_threshold:
+                self._save(key, Z, colors, indices)
+
+        result = Mesh(key, X, Y, Z, colors, indices)
+        self._meshes[key] = result
+        while len(self._meshes) > self.capacity:
+            self._meshes.popitem(last=False)
+        return result
+
+    def clear(self):
+        self._meshes.clear()
+
+    def _build(self, objective, X, Y, color, colormap_name):
+        Z = objective(np.stack((X, Y), axis=-1))
+        if color is None:
+            colors = mesh.height_colors(Z, colormap_name=colormap_name)
+        else:
+            colors = mesh.constant_colors(Z.shape, color)
+        indices = mesh.grid_indices(*Z.shape)
+        return Z, colors, indices
+
+    def _paths(self, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        return [os.path.join(self.cache_dir, f"{digest}_{name}.npy") for name in ("Z", "colors", "indices")]
+
+    def _load(self, key):
+        if self.cache_dir is None:
+            return None
+        paths = self._paths(key)
+        if not all(os.path.exists(path) for path in paths):
+            return None
+        return tuple(np.load(path, mmap_mode="r") for path in paths)
+
+    def _save(self, key, *arrays):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for path, array in zip(self._paths(key), arrays):
+            # Запись во временный файл и атомарная замена
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as file:
+                np.save(file, array)
+            os.replace(tmp_path, path)
+
+
+# Общий кэш для программ визуализации
+default_cache = MeshCache(cache_dir=".mesh_cache")
+
+
+def get_mesh(objective, x_range, y_range, resolution, color=None, colormap_name="classic", dtype=np.float64):
+    return default_cache.get(objective, x_range, y_range, resolution, color, colormap_name, dtype)
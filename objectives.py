@@ -0,0 +1,40 @@
+import numpy as np
+
+# Целевые функции в пакетной форме.
+#
+# Каждая функция принимает массив точек формы (..., D) - например, (N, D)
+# для всего роя или (H, W, 2) для сетки поверхности - и возвращает массив
+# значений формы (...) за один векторизованный вызов.
+
+SCHWEFEL_OFFSET = 418.9829
+
+
+def paraboloid(points):
+    """Параболоид: сумма квадратов координат."""
+    points = np.asarray(points)
+    return np.sum(points * points, axis=-1)
+
+
+def schwefel_raw(points):
+    """Функция Швефеля без постоянного смещения (как в shveffel.py)."""
+    points = np.asarray(points)
+    return -np.sum(points * np.sin(np.sqrt(np.abs(points))), axis=-1)
+
+
+def schwefel(points):
+    """Функция Швефеля с минимумом 0 в точке (420.9687, ..., 420.9687)."""
+    points = np.asarray(points)
+    return SCHWEFEL_OFFSET * points.shape[-1] + schwefel_raw(points)
+
+
+def penalty(points, minvalues, maxvalues, ratio):
+    """Штраф за выход точек за границы области поиска."""
+    points = np.asarray(points)
+    below = np.clip(np.asarray(minvalues) - points, 0.0, None)
+    above = np.clip(points - np.asarray(maxvalues), 0.0, None)
+    return ratio * np.sum(below + above, axis=-1)
+
+
+def evaluate_grid(objective, X, Y):
+    """Вычисляет целевую функцию на сетке meshgrid за один вызов."""
+    return objective(np.stack((X, Y), axis=-1))
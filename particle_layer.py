@@ -0,0 +1,77 @@
+from OpenGL.GL import *
+import numpy as np
+
+from surface_renderer import gl_array
+
+
+def with_heights(positions, objective):
+    """Точки (N, 3) float32 для 3D-вида: X, Y частиц и высота поверхности под ними."""
+    points = np.empty((len(positions), 3), dtype=np.float32)
+    points[:, :2] = positions[:, :2]
+    points[:, 2] = objective(positions[:, :2])
+    return points
+
+
+class ParticleLayer:
+    """Частицы в потоковом буфере видеопамяти.
+
+    Каждый кадр массив позиций копируется в постоянный VBO (с «осиротением»
+    старого хранилища, чтобы не ждать GPU), а все точки рисуются одним
+    вызовом glDrawArrays(GL_POINTS).
+    """
+
+    def __init__(self, components=3, color=(0.0, 1.0, 1.0), point_size=10):
+        self.components = components
+        self.color = color
+        self.point_size = point_size
+        self._buffer = None
+        self._count = 0
+        self._stride = 0
+        self._source = None
+
+    def view(self, components=2, color=(1.0, 0.0, 0.0), point_size=5):
+        """Слой, рисующий первые components координат из буфера этого слоя.
+
+        Загрузка не повторяется: например, 2D-вид берёт X, Y из буфера
+        3D-частиц (в том же или разделяемом контексте OpenGL).
+        """
+        layer = ParticleLayer(components, color, point_size)
+        layer._source = self
+        return layer
+
+    def update(self, points):
+        # float32 уходит в буфер без копии, float64 преобразуется один раз
+        points = gl_array(points)
+        # Буфер создаётся при первой загрузке в текущем контексте
+        if self._buffer is None:
+            self._buffer = glGenBuffers(1)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self._buffer)
+        glBufferData(GL_ARRAY_BUFFER, points.nbytes, None, GL_STREAM_DRAW)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, points.nbytes, points)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self._count = len(points)
+        self._stride = points.strides[0]
+
+    def draw(self):
+        source = self._source if self._source is not None else self
+        if source._count == 0:
+            return
+        glColor3f(*self.color)
+        glPointSize(self.point_size)
+
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, source._buffer)
+        glVertexPointer(self.components, GL_FLOAT, source._stride, None)
+        glDrawArrays(GL_POINTS, 0, source._count)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    def delete(self):
+        if self._source is not None:
+            self._source = None
+            return
+        if self._buffer is not None:
+            glDeleteBuffers(1, [self._buffer])
+            self._buffer = None
+        self._count = 0
@@ -0,0 +1,77 @@
+import numpy as np
+
+import objectives
+
+# Политика точности вычислений: рой, сетки и буферы OpenGL работают в одном
+# типе. float32 вдвое уменьшает память и объём копирования для больших роёв
+# и плотных сеток; validate() показывает, насколько результаты расходятся
+# с float64 на тестовых функциях.
+
+PRECISIONS = {
+    "float32": np.float32,
+    "float64": np.float64,
+}
+
+# Тестовые функции для проверки: (целевая функция, граница области)
+VALIDATION_FUNCTIONS = {
+    "paraboloid": (objectives.paraboloid, 100.0),
+    "schwefel": (objectives.schwefel, 500.0),
+}
+
+
+def resolve_dtype(precision):
+    """Тип NumPy для имени точности ("float32" или "float64")."""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Неизвестная точность: {precision}")
+    return np.dtype(PRECISIONS[precision])
+
+
+def objective_drift(objective, bound, dimension, count=100_000, seed=0):
+    """Наибольшая абсолютная и относительная разница значений float32 и float64 в одних точках."""
+    points = np.random.default_rng(seed).uniform(-bound, bound, (count, dimension))
+    exact = objective(points)
+    approx = objective(points.astype(np.float32)).astype(np.float64)
+    error = np.abs(approx - exact)
+    scale = np.maximum(np.abs(exact), np.finfo(np.float32).tiny)
+    return float(error.max()), float((error / scale).max())
+
+
+def swarm_drift(swarm_class, bound, dimension, swarmsize=200, iterations=200, seed=0):
+    """Лучшие значения роя в float64 и float32 при одинаковых параметрах и зерне."""
+    best = {}
+    for name, dtype in PRECISIONS.items():
+        swarm = swarm_class(swarmsize, [-bound] * dimension, [bound] * dimension, 0.1, 1.0, 5.0,
+                            seed=seed, dtype=dtype)
+        for _ in range(iterations):
+            swarm.nextIteration()
+        best[name] = float(swarm.global_best_value)
+    return best
+
+
+def validate(dimension=2, swarmsize=200, iterations=200, seed=0):
+    """Отчёт о расхождении float32 и float64 по каждой тестовой функции."""
+    # Рои импортируются здесь: swarm_x2 и f сами не зависят от этого модуля
+    from f import SwarmSchwefel
+    from swarm_x2 import SwarmX2
+
+    swarms = {"paraboloid": SwarmX2, "schwefel": SwarmSchwefel}
+    report = {}
+    for name, (objective, bound) in VALIDATION_FUNCTIONS.items():
+        absolute, relative = objective_drift(objective, bound, dimension, seed=seed)
+        best = swarm_drift(swarms[name], bound, dimension, swarmsize, iterations, seed)
+        report[name] = {
+            "max_abs_error": absolute,
+            "max_rel_error": relative,
+            "best_float64": best["float64"],
+            "best_float32": best["float32"],
+        }
+    return report
+
+
+def print_validation(report):
+    for name, result in report.items():
+        print(f"{name}:")
+        print(f"  Макс. абсолютная ошибка float32: {result['max_abs_error']:.3g}")
+        print(f"  Макс. относительная ошибка:      {result['max_rel_error']:.3g}")
+        print(f"  Лучшее значение float64:         {result['best_float64']:.6g}")
+        print(f"  Лучшее значение float32:         {result['best_float32']:.6g}")
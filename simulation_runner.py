@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# Неизменяемый снимок состояния роя для отрисовки
+Snapshot = namedtuple("Snapshot", ["iteration", "positions", "global_best_position", "global_best_value"])
+
+
+class SimulationRunner:
+    """Продвигает рой в отдельном потоке и публикует снимки через тройной буфер.
+
+    Цикл отрисовки вызывает latest() и всегда получает последний готовый
+    снимок, не дожидаясь итерации роя. steps_per_frame ограничивает число
+    итераций на один показанный кадр (None - без ограничения).
+    """
+
+    def __init__(self, swarm, steps_per_frame=1, max_iterations=None, checkpoint=None, recorder=None, stopping=None):
+        self.swarm = swarm
+        self.checkpoint = checkpoint
+        self.recorder = recorder
+        self.stopping = stopping
+        self.stop_reason = None
+        self.steps_per_frame = steps_per_frame
+        self.max_iterations = max_iterations
+
+        self._buffers = [np.empty_like(swarm.positions) for _ in range(3)]
+        self._condition = threading.Condition()
+        self._latest_index = 0
+        self._reading_index = 0
+        self._allowed_steps = 0
+        self._running = False
+        self._thread = None
+        self.last_iteration_time = 0.0
+        self._step_time = 0.0  # Время итераций с последнего take_step_time()
+        self._latest = self._publish()
+
+    @property
+    def finished(self):
+        if self.stop_reason is not None:
+            return True
+        return self.max_iterations is not None and self._latest.iteration >= self.max_iterations
+
+    def start(self):
+        if self.recorder is not None:
+            self.recorder.record(self.swarm)
+        if self.stopping is not None:
+            self.stopping.start(self.swarm)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.checkpoint is not None:
+            self.checkpoint.save()
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def latest(self):
+        """Последний опубликованный снимок; засчитывается как показанный кадр."""
+        with self._condition:
+            self._reading_index = self._latest_index
+            if self.steps_per_frame is not None:
+                self._allowed_steps = self.steps_per_frame
+                self._condition.notify_all()
+            return self._latest
+
+    def take_step_time(self):
+        """Суммарное время итераций роя с прошлого вызова (для профилировщика кадра)."""
+        with self._condition:
+            step_time, self._step_time = self._step_time, 0.0
+        return step_time
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self.steps_per_frame is not None and self._allowed_steps <= 0:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                self._allowed_steps -= 1
+
+            if self.max_iterations is not None and self.swarm.iteration >= self.max_iterations:
+                self.stop_reason = "max_iterations"
+                return
+            start = time.perf_counter()
+            self.swarm.nextIteration()
+            self.last_iteration_time = time.perf_counter() - start
+            with self._condition:
+                self._step_time += self.last_iteration_time
+            if self.checkpoint is not None:
+                self.checkpoint.maybe_save()
+            if self.recorder is not None:
+                self.recorder.record(self.swarm)
+
+            snapshot_index = self._free_index()
+            snapshot = self._publish(snapshot_index)
+            with self._condition:
+                self._latest = snapshot
+                self._latest_index = snapshot_index
+
+            if self.stopping is not None and self.stopping.check(self.swarm) is not None:
+                self.stop_reason = self.stopping.reason
+                return
+
+    def _free_index(self):
+        # Буфер, который сейчас не является последним и не читается
+        with self._condition:
+            busy = (self._latest_index, self._reading_index)
+        return next(i for i in range(3) if i not in busy)
+
+    def _publish(self, index=0):
+        positions = self._buffers[index]
+        np.copyto(positions, self.swarm.positions)
+        view = positions.view()
+        view.flags.writeable = False
+        return Snapshot(self.swarm.iteration, view, self.swarm.global_best_position.copy(), self.swarm.global_best_value)
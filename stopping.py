@@ -0,0 +1,76 @@
+import time
+
+import numpy as np
+
+# Критерии досрочной остановки роя. check() вызывается после каждой итерации
+# и возвращает причину остановки (ключ REASONS) или None.
+
+REASONS = {
+    "max_iterations": "достигнуто число итераций",
+    "stagnation": "нет улучшения",
+    "collapse": "рой сжался",
+    "target": "достигнуто целевое значение",
+    "time_budget": "исчерпано время",
+    "evaluation_budget": "исчерпан бюджет вычислений функции",
+}
+
+
+class StoppingCriteria:
+    """Набор критериев остановки; None отключает критерий.
+
+    stagnation - глобальный лучший результат не улучшился больше чем на
+    tolerance за patience итераций; collapse - все частицы ближе
+    collapse_radius к центру роя; target - лучшее значение не больше
+    target_value; time_budget - секунды с start(); max_evaluations -
+    число вычислений целевой функции.
+    """
+
+    def __init__(self, max_iterations=None, tolerance=0.0, patience=None, collapse_radius=None,
+                 target_value=None, time_budget=None, max_evaluations=None):
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.patience = patience
+        self.collapse_radius = collapse_radius
+        self.target_value = target_value
+        self.time_budget = time_budget
+        self.max_evaluations = max_evaluations
+        self.reason = None
+        self._start_time = None
+
+    def start(self, swarm):
+        self.reason = None
+        self._start_time = time.perf_counter()
+        self._best_value = swarm.global_best_value
+        self._best_iteration = swarm.iteration
+
+    def check(self, swarm):
+        if self._start_time is None:
+            self.start(swarm)
+        self.reason = self._reason(swarm)
+        return self.reason
+
+    def describe(self):
+        return REASONS.get(self.reason, "")
+
+    def _reason(self, swarm):
+        if self.target_value is not None and swarm.global_best_value <= self.target_value:
+            return "target"
+
+        if swarm.global_best_value < self._best_value - self.tolerance:
+            self._best_value = swarm.global_best_value
+            self._best_iteration = swarm.iteration
+        elif self.patience is not None and swarm.iteration - self._best_iteration >= self.patience:
+            return "stagnation"
+
+        if self.collapse_radius is not None:
+            offsets = swarm.positions - swarm.positions.mean(axis=0)
+            if np.einsum("ij,ij->i", offsets, offsets).max() <= self.collapse_radius ** 2:
+                return "collapse"
+
+        if self.max_evaluations is not None and swarm.evaluations >= self.max_evaluations:
+            return "evaluation_budget"
+        if self.time_budget is not None and time.perf_counter() - self._start_time >= self.time_budget:
+            return "time_budget"
+        if self.max_iterations is not None and swarm.iteration >= self.max_iterations:
+            return "max_iterations"
+        return None
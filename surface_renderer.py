@@ -0,0 +1,145 @@
+from OpenGL.GL import *
+import numpy as np
+
+import colormap
+import mesh
+
+def gl_array(array):
+    """Непрерывный массив float32 для буфера вершин.
+
+    Вершины всегда загружаются в float32 (GL_FLOAT): массивы GL_DOUBLE
+    драйверы обычно преобразуют на CPU при каждой отрисовке. Непрерывный
+    float32 передаётся без копии, float64 преобразуется один раз при загрузке.
+    """
+    return np.ascontiguousarray(array, dtype=np.float32)
+
+
+class HeightColormapTexture:
+    """Раскраска по высоте на GPU: одномерная текстура с цветовой картой.
+
+    Текстурная координата получается из высоты вершины через glTexGen, поэтому
+    смена карты или диапазона не требует пересчёта цветов вершин на CPU.
+    """
+
+    def __init__(self, name, vmin, vmax):
+        self._texture = glGenTextures(1)
+        self.set_colormap(name)
+        self.set_range(vmin, vmax)
+
+    def set_colormap(self, name):
+        self.name = name
+        table = np.ascontiguousarray(colormap.lookup_table(name))
+        glBindTexture(GL_TEXTURE_1D, self._texture)
+        glTexParameteri(GL_TEXTURE_1D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_1D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_1D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexImage1D(GL_TEXTURE_1D, 0, GL_RGB, len(table), 0, GL_RGB, GL_FLOAT, table)
+        glBindTexture(GL_TEXTURE_1D, 0)
+
+    def set_range(self, vmin, vmax):
+        scale = 1.0 / (vmax - vmin) if vmax > vmin else 0.0
+        # s = (z - vmin) / (vmax - vmin)
+        self._plane = (0.0, 0.0, scale, -vmin * scale)
+
+    def bind(self):
+        glEnable(GL_TEXTURE_1D)
+        glBindTexture(GL_TEXTURE_1D, self._texture)
+        glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_REPLACE)
+        glTexGeni(GL_S, GL_TEXTURE_GEN_MODE, GL_OBJECT_LINEAR)
+        glTexGenfv(GL_S, GL_OBJECT_PLANE, self._plane)
+        glEnable(GL_TEXTURE_GEN_S)
+
+    def unbind(self):
+        glDisable(GL_TEXTURE_GEN_S)
+        glBindTexture(GL_TEXTURE_1D, 0)
+        glDisable(GL_TEXTURE_1D)
+
+    def delete(self):
+        glDeleteTextures([self._texture])
+
+
+class SurfaceRenderer:
+    """Поверхность в буферах видеопамяти (VBO/IBO).
+
+    Вершины, цвета и индексы загружаются один раз; каждый кадр поверхность
+    рисуется одним вызовом glDrawElements. Повторная загрузка происходит
+    только при смене ключа (функция, диапазон, разрешение).
+    """
+
+    def __init__(self):
+        self._key = None
+        self._buffers = None
+        self._index_count = 0
+
+    def set_mesh(self, key, X, Y, Z, color=None, colors=None):
+        """Загружает сетку, если ключ отличается от текущего."""
+        if key == self._key:
+            return
+        vertices = mesh.grid_vertices(X, Y, Z)
+        if colors is None:
+            colors = mesh.constant_colors(Z.shape, color) if color is not None else mesh.height_colors(Z)
+        indices = mesh.grid_indices(*Z.shape)
+        self.upload(vertices, colors, indices)
+        self._key = key
+
+    def set_cached(self, surface_mesh):
+        """Загружает сетку из mesh_cache, если она ещё не загружена."""
+        if surface_mesh.key == self._key:
+            return
+        vertices = mesh.grid_vertices(surface_mesh.X, surface_mesh.Y, surface_mesh.Z)
+        self.upload(vertices, surface_mesh.colors, surface_mesh.indices)
+        self._key = surface_mesh.key
+
+    def upload(self, vertices, colors, indices):
+        """Загружает готовые массивы вершин, цветов и индексов (вершины - в float32)."""
+        if self._buffers is None:
+            self._buffers = glGenBuffers(3)
+        vertex_buffer, color_buffer, index_buffer = self._buffers
+
+        vertices = gl_array(vertices)
+        colors = np.ascontiguousarray(colors, dtype=np.float32)
+        indices = np.ascontiguousarray(indices, dtype=np.uint32)
+
+        glBindBuffer(GL_ARRAY_BUFFER, vertex_buffer)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, color_buffer)
+        glBufferData(GL_ARRAY_BUFFER, colors.nbytes, colors, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, index_buffer)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+        self._index_count = indices.size
+        self._key = None
+
+    def draw(self, height_colormap=None):
+        """Рисует сетку; с height_colormap цвет берётся из текстуры по высоте."""
+        if self._buffers is None or self._index_count == 0:
+            return
+        if height_colormap is not None:
+            height_colormap.bind()
+        vertex_buffer, color_buffer, index_buffer = self._buffers
+
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, vertex_buffer)
+        glVertexPointer(3, GL_FLOAT, 0, None)
+        glBindBuffer(GL_ARRAY_BUFFER, color_buffer)
+        glColorPointer(3, GL_FLOAT, 0, None)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, index_buffer)
+
+        glDrawElements(GL_TRIANGLES, self._index_count, GL_UNSIGNED_INT, None)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        if height_colormap is not None:
+            height_colormap.unbind()
+
+    def delete(self):
+        if self._buffers is not None:
+            glDeleteBuffers(3, self._buffers)
+            self._buffers = None
+        self._key = None
+        self._index_count = 0
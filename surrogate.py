@@ -0,0 +1,169 @@
+import json
+
+import numpy as np
+
+# Предварительный отбор частиц по суррогатной модели.
+#
+# Когда целевая функция - дорогая симуляция, новые позиции роя сначала
+# оцениваются RBF-моделью, построенной по последним настоящим вычислениям.
+# Настоящая функция вызывается только для частиц, которые по прогнозу
+# улучшают свой личный лучший результат (и для небольшой доли остальных,
+# чтобы модель продолжала учиться). Отсеянные частицы получают значение inf
+# и не меняют личные лучшие позиции.
+
+
+class RBFSurrogate:
+    """Интерполяция кубическими радиальными базисными функциями с линейным членом.
+
+    Хранит не больше window последних точек (скользящее окно в кольцевом
+    буфере). Матрица ядра обновляется по мере добавления: для k новых точек
+    считаются только их k строк, O(k * window * dimension). Система
+    (window + dimension + 1)^2 решается заново не при каждом добавлении, а
+    после refit_every новых точек (по умолчанию window / 2), так что на одну
+    точку приходится O(window^3 / refit_every); между решениями прогноз даёт
+    предыдущая модель.
+    """
+
+    def __init__(self, dimension, window=400, smoothing=1e-8, refit_every=None):
+        self.window = window
+        self.smoothing = smoothing
+        self.refit_every = refit_every if refit_every is not None else max(1, window // 2)
+        self._points = np.empty((window, dimension))
+        self._values = np.empty(window)
+        self._kernel = np.empty((window, window))
+        self._count = 0
+        self._next = 0
+        self._added = 0  # Точек, добавленных после последнего решения системы
+        self._centers = None
+        self._weights = None
+        self._tail = None
+
+    def __len__(self):
+        return self._count
+
+    def add(self, points, values):
+        """Добавляет вычисленные точки, вытесняя самые старые."""
+        points, values = points[-self.window:], values[-self.window:]
+        finite = np.isfinite(values)
+        points, values = points[finite], values[finite]
+        if len(values) == 0:
+            return
+        index = (self._next + np.arange(len(values))) % self.window
+        self._points[index] = points
+        self._values[index] = values
+        self._next = (self._next + len(values)) % self.window
+        self._count = min(self._count + len(values), self.window)
+        self._added += len(values)
+
+        # Новые строки и столбцы матрицы ядра
+        rows = _distances(points, self._points[:self._count]) ** 3
+        self._kernel[index, :self._count] = rows
+        self._kernel[:self._count, index] = rows.T
+
+    def predict(self, points):
+        if self._weights is None or self._added >= self.refit_every:
+            self._fit()
+        kernel = _distances(points, self._centers) ** 3
+        return kernel @ self._weights + points @ self._tail[1:] + self._tail[0]
+
+    def state(self):
+        """Массивы окна и решённой модели для контрольной точки."""
+        count = self._count
+        state = {
+            "points": self._points[:count], "values": self._values[:count],
+            "kernel": self._kernel[:count, :count], "position": np.array([count, self._next, self._added]),
+        }
+        if self._weights is not None:
+            state.update(centers=self._centers, weights=self._weights, tail=self._tail)
+        return state
+
+    def load_state(self, state):
+        count, self._next, self._added = (int(value) for value in state["position"])
+        self._count = count
+        self._points[:count] = state["points"]
+        self._values[:count] = state["values"]
+        self._kernel[:count, :count] = state["kernel"]
+        if "weights" in state:
+            self._centers = state["centers"].copy()
+            self._weights = state["weights"].copy()
+            self._tail = state["tail"].copy()
+        else:
+            self._centers = self._weights = self._tail = None
+
+    def _fit(self):
+        count = self._count
+        centers = self._points[:count]
+        values = self._values[:count]
+        dimension = centers.shape[1]
+        # [[Ф + sI, P], [P^T, 0]] [w, c] = [f, 0], P = [1, x]
+        system = np.zeros((count + dimension + 1, count + dimension + 1))
+        system[:count, :count] = self._kernel[:count, :count]
+        system[np.arange(count), np.arange(count)] += self.smoothing
+        system[:count, count] = 1.0
+        system[:count, count + 1:] = centers
+        system[count:, :count] = system[:count, count:].T
+        rhs = np.concatenate((values, np.zeros(dimension + 1)))
+        try:
+            solution = np.linalg.solve(system, rhs)
+        except np.linalg.LinAlgError:
+            solution = np.linalg.lstsq(system, rhs, rcond=None)[0]
+        # Центры копируются: кольцевой буфер дальше перезаписывается
+        self._centers = centers.copy()
+        self._weights = solution[:count]
+        self._tail = solution[count:]
+        self._added = 0
+
+
+def _distances(a, b):
+    squared = np.einsum("ij,ij->i", a, a)[:, None] + np.einsum("ij,ij->i", b, b)[None, :] - 2.0 * a @ b.T
+    return np.sqrt(np.clip(squared, 0.0, None))
+
+
+class SurrogateScreen:
+    """Отбор частиц для настоящего вычисления по прогнозу модели.
+
+    Вычисляются частицы с прогнозом лучше личного лучшего значения, но не
+    меньше min_fraction роя (с лучшими прогнозами), плюс explore_fraction
+    случайных частиц. Пока в модели меньше min_samples точек, вычисляется всё.
+    """
+
+    def __init__(self, dimension, window=400, min_fraction=0.1, explore_fraction=0.05, min_samples=None, seed=None):
+        self.model = RBFSurrogate(dimension, window)
+        self.min_fraction = min_fraction
+        self.explore_fraction = explore_fraction
+        self.min_samples = min_samples if min_samples is not None else 2 * (dimension + 1)
+        self.rng = np.random.default_rng(seed)
+        self.true_evaluations = 0
+        self.surrogate_evaluations = 0
+
+    def select(self, positions, thresholds):
+        """Маска частиц, которым нужно настоящее вычисление."""
+        count = len(positions)
+        if len(self.model) < self.min_samples:
+            return np.ones(count, dtype=bool)
+        predicted = self.model.predict(positions)
+        self.surrogate_evaluations += count
+
+        score = predicted - thresholds
+        selected = score < 0
+        required = int(np.ceil(self.min_fraction * count))
+        if selected.sum() < required:
+            selected[np.argpartition(score, required - 1)[:required]] = True
+        selected |= self.rng.random(count) < self.explore_fraction
+        return selected
+
+    def update(self, positions, values):
+        self.true_evaluations += len(values)
+        self.model.add(positions, values)
+
+    def state(self):
+        """Состояние модели, счётчиков и генератора (массивы для .npz)."""
+        state = self.model.state()
+        state["evaluations"] = np.array([self.true_evaluations, self.surrogate_evaluations])
+        state["rng_state"] = np.frombuffer(json.dumps(self.rng.bit_generator.state).encode(), dtype=np.uint8)
+        return state
+
+    def load_state(self, state):
+        self.model.load_state(state)
+        self.true_evaluations, self.surrogate_evaluations = (int(value) for value in state["evaluations"])
+        self.rng.bit_generator.state = json.loads(state["rng_state"].tobytes().decode())
@@ -0,0 +1,167 @@
+import numpy as np
+
+import objectives
+
+
+# Функция Растригина (для параболоида)
+def rastrigin_function(x, y):
+    return x**2 + y**2
+
+
+class Particle:
+    """Одна частица роя - представление строки в общих массивах роя."""
+
+    __slots__ = ("_swarm", "_index")
+
+    def __init__(self, swarm, index):
+        self._swarm = swarm
+        self._index = index
+
+    @property
+    def position(self):
+        return self._swarm.positions[self._index]
+
+    @property
+    def velocity(self):
+        return self._swarm.velocities[self._index]
+
+    @property
+    def best_position(self):
+        return self._swarm.best_positions[self._index]
+
+    @property
+    def best_value(self):
+        return self._swarm.best_values[self._index]
+
+
+class SwarmX2:
+    """Рой частиц, хранящий состояние в виде непрерывных массивов (N, D).
+
+    Одна итерация - несколько операций над целыми массивами и argmin
+    для поиска глобального лучшего решения.
+    """
+
+    # Коэффициенты обновления скорости
+    w = 0.5
+    c1 = 1.5
+    c2 = 1.5
+
+    def __init__(self, swarmsize, minvalues, maxvalues, currentVelocityRatio, localVelocityRatio, globalVelocityRatio,
+                 seed=None, objective=None, surrogate=None, dtype=np.float64):
+        self.objective = objective if objective is not None else objectives.paraboloid
+        self.surrogate = surrogate
+        self.minvalues = minvalues
+        self.maxvalues = maxvalues
+        self.currentVelocityRatio = currentVelocityRatio
+        self.localVelocityRatio = localVelocityRatio
+        self.globalVelocityRatio = globalVelocityRatio
+
+        self.rng = np.random.default_rng(seed)
+        self._lower = np.asarray(minvalues, dtype=dtype)
+        self._upper = np.asarray(maxvalues, dtype=dtype)
+        shape = (swarmsize, len(self._lower))
+
+        # Все массивы роя хранятся в точности dtype (float32 или float64)
+        self.positions = self.rng.uniform(self._lower, self._upper, shape).astype(dtype, copy=False)
+        self.velocities = self.rng.uniform(-1, 1, shape).astype(dtype, copy=False)
+        self.best_positions = self.positions.copy()
+        self.evaluations = 0
+        self.best_values = self._evaluate(self.positions)
+
+        best = np.argmin(self.best_values)
+        self.global_best_position = self.best_positions[best].copy()
+        self.global_best_value = self.best_values[best]
+        self.iteration = 0
+        self._particles = None
+
+    @property
+    def swarmsize(self):
+        return self.positions.shape[0]
+
+    @property
+    def dtype(self):
+        return self.positions.dtype
+
+    @property
+    def dimension(self):
+        return self.positions.shape[1]
+
+    @property
+    def particles(self):
+        """Список частиц-представлений для кода отрисовки."""
+        if self._particles is None:
+            self._particles = [Particle(self, i) for i in range(self.swarmsize)]
+        return self._particles
+
+    def bestParticles(self, count):
+        """Личные лучшие позиции и значения count лучших частиц."""
+        count = min(count, self.swarmsize)
+        order = np.argsort(self.best_values)[:count]
+        return self.best_positions[order].copy(), self.best_values[order].copy()
+
+    def replaceWorst(self, positions, values):
+        """Заменяет худшие частицы пришедшими извне (миграция между роями)."""
+        count = min(len(values), self.swarmsize)
+        worst = np.argsort(self.best_values)[self.swarmsize - count:]
+        self.positions[worst] = positions[:count]
+        self.best_positions[worst] = positions[:count]
+        self.best_values[worst] = values[:count]
+        self._updateGlobalBest()
+
+    def _updateGlobalBest(self):
+        best = np.argmin(self.best_values)
+        if self.best_values[best] < self.global_best_value:
+            self.global_best_value = self.best_values[best]
+            self.global_best_position = self.best_positions[best].copy()
+
+    def _finalFunc(self, positions):
+        """Значения целевой функции для пакета позиций формы (N, D)."""
+        return self.objective(positions)
+
+    def _evaluate(self, positions, thresholds=None):
+        """Значения функции в positions.
+
+        С суррогатной моделью и порогами (личными лучшими значениями)
+        настоящая функция вычисляется только для отобранных частиц, у
+        остальных значение inf.
+        """
+        if self.surrogate is None:
+            self.evaluations += len(positions)
+            return self._finalFunc(positions)
+
+        if thresholds is None:
+            selected = np.ones(len(positions), dtype=bool)
+        else:
+            selected = self.surrogate.select(positions, thresholds)
+        values = np.full(len(positions), np.inf, dtype=positions.dtype)
+        chosen = positions[selected]
+        values[selected] = self._finalFunc(chosen)
+        self.evaluations += len(chosen)
+        self.surrogate.update(chosen, values[selected])
+        return values
+
+    def _getPenalty(self, positions, ratio):
+        return objectives.penalty(positions, self._lower, self._upper, ratio)
+
+    def _updateVelocity(self):
+        r1 = self.rng.random(self.positions.shape, dtype=self.dtype)
+        r2 = self.rng.random(self.positions.shape, dtype=self.dtype)
+        self.velocities *= self.w
+        self.velocities += self.c1 * r1 * (self.best_positions - self.positions)
+        self.velocities += self.c2 * r2 * (self.global_best_position - self.positions)
+
+    def _updatePosition(self):
+        self.positions += self.velocities
+        np.clip(self.positions, self._lower, self._upper, out=self.positions)
+
+    def nextIteration(self):
+        self._updateVelocity()
+        self._updatePosition()
+
+        values = self._evaluate(self.positions, self.best_values)
+        improved = values < self.best_values
+        self.best_values[improved] = values[improved]
+        self.best_positions[improved] = self.positions[improved]
+
+        self._updateGlobalBest()
+        self.iteration += 1
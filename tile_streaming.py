@@ -0,0 +1,295 @@
+import math
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from OpenGL.GL import *
+import numpy as np
+
+import mesh
+
+# Поверхность из квадратных плиток, которые строятся по мере появления в кадре.
+#
+# Плитка уровня level имеет сторону tile_size * 2 ** level и всегда одно и то
+# же число узлов, поэтому при отдалении камеры берётся более крупный уровень и
+# число плиток в кадре не растёт. Плитки считаются в пуле потоков; готовые
+# массивы хранятся в кэше LRU в памяти, а загруженные буферы - в кэше LRU в
+# видеопамяти. Плитки вне пирамиды видимости не рисуются. Пока плитка не
+# готова, на её месте рисуется готовый родитель или четыре готовых потомка.
+
+# Готовая плитка: вершины, цвета и диапазон высот (для отсечения)
+Tile = namedtuple("Tile", ["key", "vertices", "colors", "z_min", "z_max"])
+
+
+def frustum_planes(projection, modelview):
+    """Шесть плоскостей (6, 4) пирамиды видимости в координатах модели.
+
+    Матрицы - как их возвращает glGetFloatv (по столбцам); точка p видима,
+    если plane @ (p, 1) >= 0 для всех плоскостей.
+    """
+    clip = np.asarray(projection, dtype=np.float64).reshape(4, 4).T @ np.asarray(modelview, dtype=np.float64).reshape(4, 4).T
+    planes = np.array([clip[3] + clip[0], clip[3] - clip[0], clip[3] + clip[1],
+                       clip[3] - clip[1], clip[3] + clip[2], clip[3] - clip[2]])
+    return planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+
+
+def boxes_visible(planes, lower, upper):
+    """Маска прямоугольных параллелепипедов (lower, upper: (n, 3)), задевающих пирамиду."""
+    normals = planes[:, :3]
+    # Для каждой плоскости - вершина коробки, дальше всех лежащая по нормали
+    farthest = np.where(normals[None, :, :] >= 0, upper[:, None, :], lower[:, None, :])
+    distances = np.einsum("npk,pk->np", farthest, normals) + planes[None, :, 3]
+    return (distances >= 0).all(axis=1)
+
+
+def camera_from_modelview(modelview):
+    """Положение камеры и направление взгляда в координатах модели."""
+    inverse = np.linalg.inv(np.asarray(modelview, dtype=np.float64).reshape(4, 4).T)
+    return inverse[:3, 3], -inverse[:3, 2]
+
+
+class TileStreamer:
+    """Потоковая поверхность objective(x, y) из плиток с кэшами LRU.
+
+    extent = (min, max) ограничивает область по обеим осям (None - без
+    ограничения). Память ограничена cpu_capacity плитками в памяти и
+    gpu_capacity плитками в видеопамяти независимо от размера области.
+    """
+
+    def __init__(self, objective, tile_size=100.0, resolution=64, extent=None, z_range=None,
+                 colormap_name="classic", view_radius=1.5, max_radius_tiles=6, cpu_capacity=512,
+                 gpu_capacity=256, workers=4, uploads_per_frame=8):
+        self.objective = objective
+        self.tile_size = tile_size
+        self.resolution = resolution
+        self.extent = extent
+        self.colormap_name = colormap_name
+        self.view_radius = view_radius  # Радиус области плиток в долях расстояния до камеры
+        self.max_radius_tiles = max_radius_tiles
+        self.cpu_capacity = cpu_capacity
+        self.gpu_capacity = gpu_capacity
+        self.uploads_per_frame = uploads_per_frame
+
+        if z_range is None:
+            # Диапазон высот по грубой выборке - общий для всех плиток, чтобы цвета совпадали на стыках
+            low, high = extent if extent is not None else (-8 * tile_size, 8 * tile_size)
+            grid = np.linspace(low, high, 129)
+            X, Y = np.meshgrid(grid, grid)
+            Z = objective(np.stack((X, Y), axis=-1))
+            z_range = (float(Z.min()), float(Z.max()))
+        self.z_min, self.z_max = z_range
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tile")
+        self._pending = {}
+        self._tiles = OrderedDict()  # Кэш массивов плиток (LRU)
+        self._buffers = OrderedDict()  # Кэш буферов видеопамяти: key -> (вершины, цвета, z_min, z_max)
+        self._index_buffer = None
+        self._index_count = 0
+        self.level = 0
+        self.visible = 0
+
+    def set_colormap(self, name):
+        """Смена цветовой карты: цвета запекаются в плитки, поэтому кэши сбрасываются."""
+        if name == self.colormap_name:
+            return
+        self.colormap_name = name
+        self.clear()
+
+    def clear(self):
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._tiles.clear()
+        for vertex_buffer, color_buffer, _, _ in self._buffers.values():
+            glDeleteBuffers(2, [vertex_buffer, color_buffer])
+        self._buffers.clear()
+
+    def tile_bounds(self, key):
+        """Границы плитки (x0, x1, y0, y1) с учётом extent."""
+        level, ix, iy = key
+        size = self.tile_size * (1 << level)
+        x0, x1, y0, y1 = ix * size, (ix + 1) * size, iy * size, (iy + 1) * size
+        if self.extent is not None:
+            low, high = self.extent
+            x0, x1, y0, y1 = max(x0, low), min(x1, high), max(y0, low), min(y1, high)
+        return x0, x1, y0, y1
+
+    def build_tile(self, key):
+        """Строит массивы плитки (вызывается в рабочем потоке)."""
+        x0, x1, y0, y1 = self.tile_bounds(key)
+        count = self.resolution + 1
+        X, Y = np.meshgrid(np.linspace(x0, x1, count), np.linspace(y0, y1, count))
+        Z = self.objective(np.stack((X, Y), axis=-1))
+        vertices = mesh.grid_vertices(X, Y, Z)
+        colors = mesh.height_colors(Z.ravel(), self.z_min, self.z_max, self.colormap_name)
+        return Tile(key, vertices, colors, float(Z.min()), float(Z.max()))
+
+    def candidates(self, eye, forward):
+        """Уровень и ключи плиток вокруг точки, на которую смотрит камера."""
+        height = float(np.linalg.norm(eye))
+        radius = self.view_radius * max(height, self.tile_size)
+        level = max(0, math.ceil(math.log2(radius / (self.max_radius_tiles * self.tile_size))))
+        size = self.tile_size * (1 << level)
+
+        # Центр области - пересечение взгляда со средней высотой поверхности, не дальше radius
+        center = eye[:2].copy()
+        z_mid = 0.5 * (self.z_min + self.z_max)
+        if abs(forward[2]) > 1e-6:
+            t = (z_mid - eye[2]) / forward[2]
+            if t > 0:
+                center = eye[:2] + forward[:2] * min(t, radius)
+
+        low_x, high_x = center[0] - radius, center[0] + radius
+        low_y, high_y = center[1] - radius, center[1] + radius
+        if self.extent is not None:
+            low, high = self.extent
+            low_x, low_y = max(low_x, low), max(low_y, low)
+            high_x, high_y = min(high_x, high), min(high_y, high)
+            if low_x >= high_x or low_y >= high_y:
+                return level, []
+        ix = np.arange(math.floor(low_x / size), math.ceil(high_x / size))
+        iy = np.arange(math.floor(low_y / size), math.ceil(high_y / size))
+        # Ближние к центру плитки запрашиваются первыми
+        ix, iy = np.meshgrid(ix, iy)
+        ix, iy = ix.ravel(), iy.ravel()
+        order = np.argsort(np.hypot((ix + 0.5) * size - center[0], (iy + 0.5) * size - center[1]))
+        return level, [(level, int(ix[i]), int(iy[i])) for i in order]
+
+    def cull(self, keys, planes):
+        """Оставляет плитки, задевающие пирамиду видимости.
+
+        Для ещё не построенных плиток высота берётся по всему диапазону z.
+        """
+        if not keys:
+            return keys
+        lower = np.empty((len(keys), 3))
+        upper = np.empty((len(keys), 3))
+        for row, key in enumerate(keys):
+            x0, x1, y0, y1 = self.tile_bounds(key)
+            z_min, z_max = self._height_range(key)
+            lower[row] = (x0, y0, z_min)
+            upper[row] = (x1, y1, z_max)
+        mask = boxes_visible(planes, lower, upper)
+        return [key for key, visible in zip(keys, mask) if visible]
+
+    def draw(self, height_colormap=None):
+        """Выбирает, догружает и рисует видимые плитки при текущих матрицах камеры."""
+        projection = glGetFloatv(GL_PROJECTION_MATRIX)
+        modelview = glGetFloatv(GL_MODELVIEW_MATRIX)
+        eye, forward = camera_from_modelview(modelview)
+        self.level, keys = self.candidates(eye, forward)
+        keys = self.cull(keys, frustum_planes(projection, modelview))
+        self.visible = len(keys)
+
+        self._collect()
+        self._upload(keys)
+        self._request(keys)
+        tiles = self._drawable(keys)
+        if not tiles:
+            return
+
+        if self._index_buffer is None:
+            indices = mesh.grid_indices(self.resolution + 1, self.resolution + 1)
+            self._index_buffer = glGenBuffers(1)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._index_buffer)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+            self._index_count = indices.size
+
+        if height_colormap is not None:
+            height_colormap.bind()
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._index_buffer)
+        for key in tiles:
+            vertex_buffer, color_buffer, _, _ = self._buffers[key]
+            self._buffers.move_to_end(key)
+            glBindBuffer(GL_ARRAY_BUFFER, vertex_buffer)
+            glVertexPointer(3, GL_FLOAT, 0, None)
+            glBindBuffer(GL_ARRAY_BUFFER, color_buffer)
+            glColorPointer(3, GL_FLOAT, 0, None)
+            glDrawElements(GL_TRIANGLES, self._index_count, GL_UNSIGNED_INT, None)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        if height_colormap is not None:
+            height_colormap.unbind()
+
+    def delete(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.clear()
+        if self._index_buffer is not None:
+            glDeleteBuffers(1, [self._index_buffer])
+            self._index_buffer = None
+
+    def _height_range(self, key):
+        if key in self._buffers:
+            return self._buffers[key][2:]
+        tile = self._tiles.get(key)
+        if tile is not None:
+            return tile.z_min, tile.z_max
+        return self.z_min, self.z_max
+
+    def _request(self, keys):
+        """Ставит в очередь недостающие плитки и отменяет ушедшие из кадра."""
+        wanted = set(keys)
+        for key in [key for key in self._pending if key not in wanted]:
+            if self._pending[key].cancel():
+                del self._pending[key]
+        for key in keys:
+            if key not in self._buffers and key not in self._tiles and key not in self._pending:
+                self._pending[key] = self._executor.submit(self.build_tile, key)
+
+    def _collect(self):
+        """Переносит готовые плитки из пула потоков в кэш массивов."""
+        for key in [key for key, future in self._pending.items() if future.done()]:
+            future = self._pending.pop(key)
+            if future.cancelled():
+                continue
+            self._tiles[key] = future.result()
+            self._tiles.move_to_end(key)
+        while len(self._tiles) > self.cpu_capacity:
+            self._tiles.popitem(last=False)
+
+    def _upload(self, keys):
+        """Загружает в видеопамять не больше uploads_per_frame видимых готовых плиток."""
+        uploads = 0
+        for key in keys:
+            if uploads >= self.uploads_per_frame:
+                break
+            if key in self._buffers or key not in self._tiles:
+                continue
+            tile = self._tiles[key]
+            self._tiles.move_to_end(key)
+            vertex_buffer, color_buffer = glGenBuffers(2)
+            glBindBuffer(GL_ARRAY_BUFFER, vertex_buffer)
+            glBufferData(GL_ARRAY_BUFFER, tile.vertices.nbytes, tile.vertices, GL_STATIC_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, color_buffer)
+            glBufferData(GL_ARRAY_BUFFER, tile.colors.nbytes, tile.colors, GL_STATIC_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            self._buffers[key] = (vertex_buffer, color_buffer, tile.z_min, tile.z_max)
+            uploads += 1
+        while len(self._buffers) > self.gpu_capacity:
+            _, (vertex_buffer, color_buffer, _, _) = self._buffers.popitem(last=False)
+            glDeleteBuffers(2, [vertex_buffer, color_buffer])
+
+    def _drawable(self, keys):
+        """Загруженные плитки для кадра; вместо неготовой - родитель или четыре потомка."""
+        drawn = []
+        covered = set()
+        for key in keys:
+            if key in self._buffers:
+                drawn.append(key)
+        missing = [key for key in keys if key not in self._buffers]
+        for level, ix, iy in missing:
+            parent = (level + 1, ix >> 1, iy >> 1)
+            if parent in self._buffers:
+                covered.add(parent)
+                continue
+            children = [(level - 1, 2 * ix + dx, 2 * iy + dy) for dy in (0, 1) for dx in (0, 1)]
+            if level > 0 and all(child in self._buffers for child in children):
+                drawn.extend(children)
+        if covered:
+            # Родитель рисуется вместо всех своих потомков, чтобы поверхности не накладывались
+            drawn = [key for key in drawn if (key[0] + 1, key[1] >> 1, key[2] >> 1) not in covered]
+            drawn.extend(covered)
+        return drawn
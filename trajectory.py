@@ -0,0 +1,123 @@
+import os
+
+import numpy as np
+
+from simulation_runner import Snapshot
+
+# Запись траектории роя в файлы с отображением в память.
+#
+# Каталог записи содержит два заранее выделенных массива .npy:
+#   positions.npy - (итерации, частицы, размерность), float32;
+#   best.npy      - (итерации, 2 + размерность): номер итерации, лучшее
+#                   значение и лучшая позиция. Незаписанные строки - NaN,
+#                   по ним при открытии определяется число кадров.
+# Воспроизведение берёт срезы отображённого массива без копирования, так что
+# траектория не читается в память целиком.
+
+
+def _paths(path):
+    return os.path.join(path, "positions.npy"), os.path.join(path, "best.npy")
+
+
+class TrajectoryRecorder:
+    """Дописывает позиции частиц и глобальный лучший результат каждой итерации."""
+
+    def __init__(self, path, swarmsize, dimension, capacity, dtype=np.float32, flush_every=100):
+        os.makedirs(path, exist_ok=True)
+        positions_path, best_path = _paths(path)
+        self.path = path
+        self.flush_every = flush_every
+        self.positions = np.lib.format.open_memmap(positions_path, mode="w+", dtype=dtype,
+                                                   shape=(capacity, swarmsize, dimension))
+        self.best = np.lib.format.open_memmap(best_path, mode="w+", dtype=np.float64,
+                                              shape=(capacity, 2 + dimension))
+        self.best[:] = np.nan
+        self.count = 0
+
+    @property
+    def capacity(self):
+        return len(self.positions)
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+    def record(self, swarm):
+        """Записывает текущее состояние роя; при заполненном файле ничего не делает."""
+        if self.full:
+            return False
+        self.positions[self.count] = swarm.positions
+        row = self.best[self.count]
+        row[2:] = swarm.global_best_position
+        row[1] = swarm.global_best_value
+        row[0] = swarm.iteration
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.flush()
+        return True
+
+    def flush(self):
+        self.positions.flush()
+        self.best.flush()
+
+    def close(self):
+        self.flush()
+
+
+class Trajectory:
+    """Записанная траектория, открытая только для чтения через memory-map."""
+
+    def __init__(self, path):
+        positions_path, best_path = _paths(path)
+        self.positions = np.load(positions_path, mmap_mode="r")
+        self.best = np.load(best_path, mmap_mode="r")
+        # Запись идёт по порядку, поэтому кадры - это строки до первого NaN
+        missing = np.flatnonzero(np.isnan(self.best[:, 0]))
+        self.count = int(missing[0]) if len(missing) else len(self.best)
+
+    def __len__(self):
+        return self.count
+
+    def snapshot(self, index):
+        """Кадр index в виде снимка; позиции - срез файла без копирования."""
+        if not 0 <= index < self.count:
+            raise IndexError(f"Кадр {index} вне записи из {self.count} кадров")
+        row = self.best[index]
+        return Snapshot(int(row[0]), self.positions[index], row[2:], float(row[1]))
+
+
+class ReplayPlayer:
+    """Воспроизведение траектории: пауза, шаг и перемотка по кадрам."""
+
+    def __init__(self, trajectory, frames_per_step=1):
+        if len(trajectory) == 0:
+            raise ValueError("Траектория не содержит ни одного кадра")
+        self.trajectory = trajectory
+        self.frames_per_step = frames_per_step
+        self.index = 0
+        self.playing = True
+
+    @property
+    def finished(self):
+        return self.index >= len(self.trajectory) - 1
+
+    def toggle_pause(self):
+        self.playing = not self.playing
+
+    def step(self, count):
+        """Переходит на count кадров вперёд или назад и ставит на паузу."""
+        self.playing = False
+        self.seek(self.index + count)
+
+    def seek(self, index):
+        self.index = min(max(index, 0), len(self.trajectory) - 1)
+
+    def seek_fraction(self, fraction):
+        self.seek(int(round(fraction * (len(self.trajectory) - 1))))
+
+    def latest(self):
+        """Текущий кадр; при воспроизведении затем сдвигается на frames_per_step."""
+        snapshot = self.trajectory.snapshot(self.index)
+        if self.playing:
+            self.seek(self.index + self.frames_per_step)
+        return snapshot
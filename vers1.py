@@ -1,77 +1,75 @@
 import vtk
+from vtk.util import numpy_support
 import numpy as np
 
+import mesh
+from expressions import compile_expression
+
 
 # Функция для построения графика
-def create_surface(equation, x_range, y_range):
+def create_surface(equation, x_range, y_range, resolution=100):
     # Создаем точки для сетки
-    x_vals = np.linspace(x_range[0], x_range[1], 100)
-    y_vals = np.linspace(y_range[0], y_range[1], 100)
+    x_vals = np.linspace(x_range[0], x_range[1], resolution)
+    y_vals = np.linspace(y_range[0], y_range[1], resolution)
     x, y = np.meshgrid(x_vals, y_vals)
 
-    # Вычисляем значения z
-    z = eval(equation)
+    # Вычисляем значения z скомпилированным выражением
+    z = compile_expression(equation).evaluate_grid(x_vals, y_vals)
 
-    # Создаем массив точек
+    # Создаем массив точек напрямую из массива numpy
+    vertices = np.column_stack((x.ravel(), y.ravel(), z.ravel()))
     points = vtk.vtkPoints()
-    for i in range(len(x_vals)):
-        for j in range(len(y_vals)):
-            points.InsertNextPoint(x[i, j], y[i, j], z[i, j])
+    points.SetData(numpy_support.numpy_to_vtk(vertices, deep=True))
 
     # Создаем полигональную поверхность
     poly_data = vtk.vtkPolyData()
     poly_data.SetPoints(points)
 
-    # Создаем ячейки для треугольников
-    triangles = vtk.vtkCellArray()
-    for i in range(len(x_vals) - 1):
-        for j in range(len(y_vals) - 1):
-            id1 = i * len(y_vals) + j
-            id2 = id1 + 1
-            id3 = id1 + len(y_vals)
-            id4 = id3 + 1
-
-            triangles.InsertNextCell(3)
-            triangles.InsertCellPoint(id1)
-            triangles.InsertCellPoint(id2)
-            triangles.InsertCellPoint(id3)
-
-            triangles.InsertNextCell(3)
-            triangles.InsertCellPoint(id2)
-            triangles.InsertCellPoint(id4)
-            triangles.InsertCellPoint(id3)
+    # Ячейки треугольников в формате [3, id1, id2, id3, ...]
+    indices = mesh.grid_indices(len(y_vals), len(x_vals)).reshape(-1, 3)
+    cells = np.empty((len(indices), 4), dtype=np.int64)
+    cells[:, 0] = 3
+    cells[:, 1:] = indices
 
+    triangles = vtk.vtkCellArray()
+    triangles.SetCells(len(indices), numpy_support.numpy_to_vtkIdTypeArray(cells.ravel(), deep=True))
     poly_data.SetPolys(triangles)
 
     return poly_data
 
 
-# Уравнение функции
-equation = "np.sin(x**2 + y**2) / (x**2 + y**2 + 1e-10)"  # Добавляем небольшое значение для избежания деления на ноль
-x_range = (-4, 4)
-y_range = (-4, 4)
+def main():
+    # Уравнение функции
+    equation = "np.sin(x**2 + y**2) / (x**2 + y**2 + 1e-10)"  # Добавляем небольшое значение для избежания деления на ноль
+    x_range = (-4, 4)
+    y_range = (-4, 4)
+    resolution = 1000  # Число узлов сетки по каждой оси
+
+    # Создаем график
+    surface_data = create_surface(equation, x_range, y_range, resolution=resolution)
+
+    # Создание маппера и актора
+    mapper = vtk.vtkPolyDataMapper()
+    mapper.SetInputData(surface_data)
 
-# Создаем график
-surface_data = create_surface(equation, x_range, y_range)
+    actor = vtk.vtkActor()
+    actor.SetMapper(mapper)
 
-# Создание маппера и актора
-mapper = vtk.vtkPolyDataMapper()
-mapper.SetInputData(surface_data)
+    # Создание рендерера, окна и интерактора
+    renderer = vtk.vtkRenderer()
+    render_window = vtk.vtkRenderWindow()
+    render_window.AddRenderer(renderer)
 
-actor = vtk.vtkActor()
-actor.SetMapper(mapper)
+    render_window_interactor = vtk.vtkRenderWindowInteractor()
+    render_window_interactor.SetRenderWindow(render_window)
 
-# Создание рендерера, окна и интерактора
-renderer = vtk.vtkRenderer()
-render_window = vtk.vtkRenderWindow()
-render_window.AddRenderer(renderer)
+    renderer.AddActor(actor)
+    renderer.SetBackground(0.1, 0.1, 0.1)  # Цвет фона
 
-render_window_interactor = vtk.vtkRenderWindowInteractor()
-render_window_interactor.SetRenderWindow(render_window)
+    # Запуск визуализации
+    render_window.Render()
+    render_window_interactor.Start()
 
-renderer.AddActor(actor)
-renderer.SetBackground(0.1, 0.1, 0.1)  # Цвет фона
 
-# Запуск визуализации
-render_window.Render()
-render_window_interactor.Start()
+if __name__ == "__main__":
+    main()
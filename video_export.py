@@ -0,0 +1,197 @@
+import ctypes
+import os
+import queue
+import shutil
+import struct
+import subprocess
+import threading
+import zlib
+
+from OpenGL.GL import *
+import numpy as np
+
+# Запись кадров в видео без остановок конвейера.
+#
+# Кадр N копируется из заднего буфера в один из кольца буферов пикселей
+# (PBO) асинхронно, а читается из PBO только через несколько кадров, когда
+# копирование уже завершено, - чтение N перекрывается с отрисовкой N + 1.
+# Готовые кадры уходят в фоновый поток, который пишет их в ffmpeg или в
+# пронумерованные PNG.
+
+
+def write_png(path, rgb, level=1):
+    """Сохраняет массив (H, W, 3) uint8 в PNG без сторонних библиотек."""
+    height, width, _ = rgb.shape
+    # Каждая строка с байтом фильтра 0 (без фильтра)
+    raw = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 0] = 0
+    raw[:, 1:] = rgb.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    with open(path, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(chunk(b"IHDR", header))
+        file.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), level)))
+        file.write(chunk(b"IEND", b""))
+
+
+class PngSink:
+    """Пронумерованные PNG в каталоге: frame_000000.png, frame_000001.png, ..."""
+
+    def __init__(self, directory, width, height, fps):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._index = 0
+
+    def write(self, rgb):
+        write_png(os.path.join(self.directory, f"frame_{self._index:06d}.png"), rgb)
+        self._index += 1
+
+    def close(self):
+        pass
+
+
+class FfmpegSink:
+    """Кадры rgb24 через канал на вход ffmpeg."""
+
+    def __init__(self, path, width, height, fps):
+        executable = shutil.which("ffmpeg")
+        if executable is None:
+            raise RuntimeError("ffmpeg не найден; для PNG укажите каталог вместо файла видео")
+        command = [
+            executable, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+            "-pix_fmt", "yuv420p", path,
+        ]
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, rgb):
+        self._process.stdin.write(rgb.tobytes())
+
+    def close(self):
+        self._process.stdin.close()
+        if self._process.wait() != 0:
+            raise RuntimeError(f"ffmpeg завершился с кодом {self._process.returncode}")
+
+
+def open_sink(path, width, height, fps):
+    """Файл с расширением - видео через ffmpeg, иначе каталог PNG."""
+    sink = FfmpegSink if os.path.splitext(path)[1] else PngSink
+    return sink(path, width, height, fps)
+
+
+class FrameWriter:
+    """Фоновый поток, который переворачивает кадры и передаёт их в sink.
+
+    Очередь ограничена max_pending кадрами: если кодировщик не успевает,
+    put() ждёт, и память не растёт.
+    """
+
+    def __init__(self, sink, max_pending=8):
+        self.sink = sink
+        self._queue = queue.Queue(max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, frame):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(frame)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self.sink.close()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                # В OpenGL строки идут снизу вверх
+                self.sink.write(np.ascontiguousarray(frame[::-1]))
+            except Exception as error:
+                self._error = error
+
+
+class PboReader:
+    """Асинхронное чтение заднего буфера через кольцо из count PBO.
+
+    read() ставит копирование текущего кадра и возвращает кадр,
+    прочитанный count - 1 вызовов назад (None, пока кольцо не заполнено).
+    """
+
+    def __init__(self, width, height, count=3):
+        self.width = width
+        self.height = height
+        self.count = count
+        self._size = width * height * 3
+        self._buffers = glGenBuffers(count)
+        for buffer in self._buffers:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+            glBufferData(GL_PIXEL_PACK_BUFFER, self._size, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self._issued = 0
+        self._collected = 0
+
+    def read(self):
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        glReadBuffer(GL_BACK)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self._buffers[self._issued % self.count])
+        glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self._issued += 1
+        if self._issued - self._collected < self.count:
+            return None
+        return self._collect()
+
+    def drain(self):
+        """Оставшиеся в кольце кадры по порядку."""
+        frames = []
+        while self._collected < self._issued:
+            frames.append(self._collect())
+        return frames
+
+    def delete(self):
+        glDeleteBuffers(self.count, self._buffers)
+
+    def _collect(self):
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self._buffers[self._collected % self.count])
+        pointer = glMapBuffer(GL_PIXEL_PACK_BUFFER, GL_READ_ONLY)
+        data = np.ctypeslib.as_array(ctypes.cast(pointer, ctypes.POINTER(ctypes.c_ubyte)), shape=(self._size,))
+        frame = data.reshape(self.height, self.width, 3).copy()
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self._collected += 1
+        return frame
+
+
+class VideoExporter:
+    """Чтение кадров через PBO и запись в фоне: capture() после отрисовки, до обмена буферов."""
+
+    def __init__(self, path, width, height, fps=30, pbo_count=3):
+        self.reader = PboReader(width, height, pbo_count)
+        self.writer = FrameWriter(open_sink(path, width, height, fps))
+        self.frames = 0
+
+    def capture(self):
+        frame = self.reader.read()
+        if frame is not None:
+            self.writer.put(frame)
+            self.frames += 1
+
+    def close(self):
+        for frame in self.reader.drain():
+            self.writer.put(frame)
+            self.frames += 1
+        self.reader.delete()
+        self.writer.close()
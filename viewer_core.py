@@ -0,0 +1,425 @@
+import os
+
+import glfw
+from OpenGL.GL import *
+from OpenGL.GLU import *
+import numpy as np
+
+from frame_profiler import FrameProfiler
+from lod_terrain import camera_in_model_space
+
+# Общее ядро программ визуализации: окно GLFW, камера, обработчики мыши и
+# клавиатуры и сцена из именованных слоёв.
+#
+# Статическая геометрия (оси, разметка) один раз компилируется в дисплейный
+# список и дальше рисуется одним glCallList; поверхность уже лежит в VBO.
+# Каждый кадр обновляются только динамические слои (частицы).
+
+AXIS_COLORS = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0))  # X - красная, Y - зелёная, Z - синяя
+WHITE_AXES = ((1.0, 1.0, 1.0),) * 3
+
+
+def draw_axes(length, colors=AXIS_COLORS, tick_spacing=None, tick_style="points", tick_size=5, line_width=2):
+    """Оси от -length до length с разметкой через tick_spacing.
+
+    tick_style "points" - точки размером tick_size на осях, "lines" -
+    поперечные штрихи длиной 2 * tick_size. Рисует в immediate mode,
+    поэтому предназначена для компиляции в StaticGeometry.
+    """
+    glLineWidth(line_width)
+    glBegin(GL_LINES)
+    for axis, color in enumerate(colors):
+        start, end = [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]
+        start[axis], end[axis] = -length, length
+        glColor3f(*color)
+        glVertex3f(*start)
+        glVertex3f(*end)
+    glEnd()
+
+    if tick_spacing is None:
+        return
+    ticks = np.arange(-length, length + tick_spacing / 2, tick_spacing)
+    glColor3f(1.0, 1.0, 1.0)
+    if tick_style == "points":
+        glPointSize(tick_size)
+        glBegin(GL_POINTS)
+        for i in ticks:
+            glVertex3f(i, 0, 0)  # Точки на оси X
+            glVertex3f(0, i, 0)  # Точки на оси Y
+            glVertex3f(0, 0, i)  # Точки на оси Z
+        glEnd()
+    else:
+        glLineWidth(1)
+        glBegin(GL_LINES)
+        for i in ticks:
+            glVertex3f(i, -tick_size, 0)  # Штрих оси X
+            glVertex3f(i, tick_size, 0)
+            glVertex3f(-tick_size, i, 0)  # Штрих оси Y
+            glVertex3f(tick_size, i, 0)
+            glVertex3f(0, -tick_size, i)  # Штрих оси Z
+            glVertex3f(0, tick_size, i)
+        glEnd()
+
+
+class StaticGeometry:
+    """Геометрия, один раз скомпилированная в дисплейный список.
+
+    build рисует её командами immediate mode; компиляция происходит при
+    первой отрисовке в текущем контексте, дальше - один glCallList.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self._list = None
+
+    def draw(self):
+        if self._list is None:
+            self._list = glGenLists(1)
+            glNewList(self._list, GL_COMPILE)
+            self.build()
+            glEndList()
+        glCallList(self._list)
+
+    def delete(self):
+        if self._list is not None:
+            glDeleteLists(self._list, 1)
+            self._list = None
+
+
+class SceneNode:
+    __slots__ = ("name", "draw", "visible")
+
+    def __init__(self, name, draw, visible=True):
+        self.name = name
+        self.draw = draw
+        self.visible = visible
+
+
+class Scene:
+    """Упорядоченный список слоёв; имя слоя - имя фазы в профилировщике кадров."""
+
+    def __init__(self):
+        self.nodes = []
+
+    def add(self, name, draw, visible=True):
+        """Добавляет слой с функцией отрисовки draw() и возвращает его узел."""
+        node = SceneNode(name, draw, visible)
+        self.nodes.append(node)
+        return node
+
+    def add_static(self, name, build):
+        """Добавляет статический слой, скомпилированный из build()."""
+        geometry = StaticGeometry(build)
+        return self.add(name, geometry.draw)
+
+    def draw(self, profiler):
+        for node in self.nodes:
+            if node.visible:
+                with profiler.phase(node.name):
+                    node.draw()
+
+
+class OrbitCamera:
+    """Перспективная камера, смотрящая в начало координат, с вращением сцены мышью.
+
+    Камера стоит в direction * distance; при swing=True - в
+    (sin(ry) * d, sin(rx) * d, d) и качается вслед за вращением.
+    """
+
+    def __init__(self, distance, direction=(1.0, 1.0, 1.0), swing=False, fov=45, near=0.1, far=500,
+                 zoom_step=None, min_distance=None, max_distance=None, rotation_speed=0.5):
+        self.distance = distance
+        self.direction = np.asarray(direction, dtype=np.float64)
+        self.swing = swing
+        self.fov = fov
+        self.near = near
+        self.far = far
+        self.zoom_step = zoom_step
+        self.min_distance = min_distance
+        self.max_distance = max_distance
+        self.rotation_speed = rotation_speed
+        self.rotation_x = 0.0
+        self.rotation_y = 0.0
+
+    def eye(self):
+        if self.swing:
+            return np.array([np.sin(np.radians(self.rotation_y)) * self.distance,
+                             np.sin(np.radians(self.rotation_x)) * self.distance,
+                             self.distance])
+        return self.direction * self.distance
+
+    def model_space_eye(self):
+        """Положение камеры в координатах модели (для выбора детализации)."""
+        return camera_in_model_space(self.eye(), self.rotation_x, self.rotation_y)
+
+    def rotate(self, dx, dy):
+        self.rotation_x += dy * self.rotation_speed  # Вращение по вертикали
+        self.rotation_y += dx * self.rotation_speed  # Вращение по горизонтали
+
+    def zoom(self, offset):
+        if self.zoom_step is None:
+            return
+        self.distance = float(np.clip(self.distance - offset * self.zoom_step, self.min_distance, self.max_distance))
+
+    def apply(self, aspect):
+        glMatrixMode(GL_PROJECTION)
+        glLoadIdentity()
+        gluPerspective(self.fov, aspect, self.near, self.far)
+        glMatrixMode(GL_MODELVIEW)
+        glLoadIdentity()
+        eye = self.eye()
+        gluLookAt(eye[0], eye[1], eye[2], 0, 0, 0, 0, 1, 0)
+        glRotatef(self.rotation_x, 1, 0, 0)
+        glRotatef(self.rotation_y, 0, 1, 0)
+
+
+class OrthoCamera:
+    """Ортографическая проекция прямоугольника extent = (xmin, xmax, ymin, ymax) для 2D-видов."""
+
+    def __init__(self, extent):
+        self.extent = extent
+
+    def rotate(self, dx, dy):
+        pass
+
+    def zoom(self, offset):
+        pass
+
+    def apply(self, aspect):
+        glMatrixMode(GL_PROJECTION)
+        glLoadIdentity()
+        glOrtho(*self.extent, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glLoadIdentity()
+
+
+class View:
+    """Камера и сцена в прямоугольнике окна viewport = (x, y, w, h) в долях размера."""
+
+    def __init__(self, camera, scene=None, viewport=(0.0, 0.0, 1.0, 1.0), depth_test=True):
+        self.camera = camera
+        self.scene = scene if scene is not None else Scene()
+        self.viewport = viewport
+        self.depth_test = depth_test
+
+    def pixels(self, width, height):
+        x, y, w, h = self.viewport
+        return int(x * width), int(y * height), max(int(w * width), 1), max(int(h * height), 1)
+
+
+def init(offscreen=False):
+    """Инициализирует GLFW; offscreen=True - для сервера без дисплея.
+
+    Без DISPLAY и WAYLAND_DISPLAY GLFW (3.4+) запускается без оконной системы,
+    а контекст создаётся программным Mesa через OSMesa; окна тогда скрыты.
+    """
+    headless = offscreen and not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+    if headless:
+        if not hasattr(glfw, "PLATFORM_NULL"):
+            raise RuntimeError("Для отрисовки без дисплея нужен GLFW 3.4 с OSMesa")
+        glfw.init_hint(glfw.PLATFORM, glfw.PLATFORM_NULL)
+    if not glfw.init():
+        raise RuntimeError("Не удалось инициализировать GLFW")
+    if headless:
+        glfw.window_hint(glfw.CONTEXT_CREATION_API, glfw.OSMESA_CONTEXT_API)
+
+
+def terminate(profiler=None, csv_path="frame_profile.csv"):
+    if profiler is not None:
+        profiler.dump_csv(csv_path)
+    glfw.terminate()
+
+
+class Viewer:
+    """Окно GLFW со своими видами и общими обработчиками ввода.
+
+    Левая кнопка мыши вращает камеру вида под курсором, колесо - приближает
+    (если у камеры задан zoom_step), P - профилировщик кадров, V -
+    вертикальная синхронизация; со key_rotation стрелки поворачивают сцену
+    на key_rotation градусов. Дополнительные клавиши - обработчики
+    handler(key, action, mods) в key_handlers. С scheduler (FrameScheduler)
+    run() держит темп кадров и подбирает число итераций роя на кадр; share -
+    другой Viewer, объекты OpenGL которого доступны и в этом окне (V в таком
+    окне переключает синхронизацию основного окна, чтобы кадр ждал её только
+    один раз); hidden -
+    окно не показывается (отрисовка в задний буфер для записи видео).
+    """
+
+    def __init__(self, title, camera, width=800, height=600, profiler=None, key_rotation=None,
+                 clear_color=(0.1, 0.1, 0.1, 1.0), depth_test=True, vsync=True, scheduler=None, share=None,
+                 hidden=False):
+        glfw.window_hint(glfw.VISIBLE, glfw.FALSE if hidden else glfw.TRUE)
+        # С share контекст окна разделяет буферы, текстуры и списки с контекстом share
+        self.window = glfw.create_window(width, height, title, None, share.window if share is not None else None)
+        if not self.window:
+            raise RuntimeError(f"Не удалось создать окно: {title}")
+        self.profiler = profiler if profiler is not None else FrameProfiler()
+        self.key_rotation = key_rotation
+        self.key_handlers = []
+        self.views = [View(camera, depth_test=depth_test)]
+        # Окно, обмен буферов которого ждёт вертикальной синхронизации
+        self.primary = share.primary if share is not None else self
+
+        self._dragging = None
+        self._last_cursor = (0.0, 0.0)
+
+        self.scheduler = scheduler
+        self.make_current()
+        glClearColor(*clear_color)
+        self.set_vsync(vsync)
+
+        glfw.set_cursor_pos_callback(self.window, self._on_cursor)
+        glfw.set_mouse_button_callback(self.window, self._on_mouse_button)
+        glfw.set_scroll_callback(self.window, self._on_scroll)
+        glfw.set_key_callback(self.window, self._on_key)
+
+    @property
+    def camera(self):
+        return self.views[0].camera
+
+    @property
+    def scene(self):
+        return self.views[0].scene
+
+    def add_view(self, camera, viewport, depth_test=True):
+        view = View(camera, viewport=viewport, depth_test=depth_test)
+        self.views.append(view)
+        return view
+
+    def make_current(self):
+        if glfw.get_current_context() != self.window:
+            glfw.make_context_current(self.window)
+
+    def set_vsync(self, enabled):
+        """Включает или выключает ожидание вертикальной синхронизации при обмене буферов."""
+        self.make_current()
+        glfw.swap_interval(1 if enabled else 0)
+        self.vsync = enabled
+        # Без синхронизации темп кадров держит планировщик
+        if self.scheduler is not None:
+            self.scheduler.pace = not enabled
+
+    def should_close(self):
+        return glfw.window_should_close(self.window)
+
+    def render(self):
+        """Рисует все виды окна в текущий задний буфер."""
+        self.make_current()
+        width, height = glfw.get_framebuffer_size(self.window)
+        split = len(self.views) > 1
+        if split:
+            glEnable(GL_SCISSOR_TEST)
+        for view in self.views:
+            x, y, w, h = view.pixels(width, height)
+            glViewport(x, y, w, h)
+            if split:
+                glScissor(x, y, w, h)
+            if view.depth_test:
+                glEnable(GL_DEPTH_TEST)
+                glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            else:
+                glDisable(GL_DEPTH_TEST)
+                glClear(GL_COLOR_BUFFER_BIT)
+            view.camera.apply(w / h)
+            view.scene.draw(self.profiler)
+        if split:
+            glDisable(GL_SCISSOR_TEST)
+
+    def swap(self):
+        with self.profiler.phase("swap_buffers"):
+            glfw.swap_buffers(self.window)
+
+    def end_frame(self):
+        glfw.poll_events()
+        self.profiler.end_frame()
+        self.profiler.maybe_report()
+
+    def run(self, update=None):
+        """Цикл отрисовки до закрытия окна; update() вызывается перед каждым кадром."""
+        scheduler = self.scheduler
+        while not self.should_close():
+            if scheduler is not None:
+                scheduler.begin_frame()
+            if update is not None:
+                update()
+            self.render()
+            if scheduler is not None:
+                scheduler.work_done()
+            self.swap()
+            self.end_frame()
+            if scheduler is not None:
+                scheduler.end_frame()
+
+    def _view_at(self, xpos, ypos):
+        width, height = glfw.get_window_size(self.window)
+        for view in reversed(self.views):
+            x, y, w, h = view.viewport
+            # Координаты курсора отсчитываются от верхнего края окна
+            u, v = xpos / max(width, 1), 1.0 - ypos / max(height, 1)
+            if x <= u <= x + w and y <= v <= y + h:
+                return view
+        return self.views[0]
+
+    def _on_cursor(self, window, xpos, ypos):
+        if self._dragging is not None:
+            dx = xpos - self._last_cursor[0]
+            dy = ypos - self._last_cursor[1]
+            self._dragging.camera.rotate(dx, dy)
+        self._last_cursor = (xpos, ypos)
+
+    def _on_mouse_button(self, window, button, action, mods):
+        if button != glfw.MOUSE_BUTTON_LEFT:
+            return
+        if action == glfw.PRESS:
+            self._last_cursor = glfw.get_cursor_pos(window)
+            self._dragging = self._view_at(*self._last_cursor)
+        elif action == glfw.RELEASE:
+            self._dragging = None
+
+    def _on_scroll(self, window, xoffset, yoffset):
+        self._view_at(*glfw.get_cursor_pos(window)).camera.zoom(yoffset)
+
+    def _on_key(self, window, key, scancode, action, mods):
+        if key == glfw.KEY_P and action == glfw.PRESS:  # Профилировщик кадров
+            self.profiler.toggle()
+        if key == glfw.KEY_V and action == glfw.PRESS:  # Вертикальная синхронизация (основного окна)
+            primary = self.primary
+            primary.set_vsync(not primary.vsync)
+            print(f"Вертикальная синхронизация {'включена' if primary.vsync else 'выключена'}")
+        if self.key_rotation is not None and action in (glfw.PRESS, glfw.REPEAT):
+            camera = self.camera
+            if key == glfw.KEY_UP:
+                camera.rotation_x -= self.key_rotation
+            elif key == glfw.KEY_DOWN:
+                camera.rotation_x += self.key_rotation
+            elif key == glfw.KEY_LEFT:
+                camera.rotation_y -= self.key_rotation
+            elif key == glfw.KEY_RIGHT:
+                camera.rotation_y += self.key_rotation
+        for handler in self.key_handlers:
+            handler(key, action, mods)
+
+
+def replay_key_handler(player):
+    """Обработчик клавиш воспроизведения траектории для Viewer.key_handlers.
+
+    Пробел - пауза, стрелки - шаг (с Shift - по 10), Home/End - начало и
+    конец, 0-9 - перемотка к доле записи.
+    """
+    def handler(key, action, mods):
+        if action == glfw.RELEASE:
+            return
+        step = 10 if mods & glfw.MOD_SHIFT else 1
+        if key == glfw.KEY_SPACE and action == glfw.PRESS:
+            player.toggle_pause()
+        elif key == glfw.KEY_RIGHT:
+            player.step(step)
+        elif key == glfw.KEY_LEFT:
+            player.step(-step)
+        elif key == glfw.KEY_HOME:
+            player.seek(0)
+        elif key == glfw.KEY_END:
+            player.seek(len(player.trajectory) - 1)
+        elif glfw.KEY_0 <= key <= glfw.KEY_9 and action == glfw.PRESS:
+            player.seek_fraction((key - glfw.KEY_0) / 10)
+    return handler